@@ -0,0 +1,225 @@
+'''
+测量热点路径性能基准，无需硬件（使用模拟传感器和合成数据）
+
+    python -m benchmarks.bench              运行并与 benchmarks/baseline.json 比较
+    python -m benchmarks.bench --save       运行并将结果保存为新的基准
+    python -m benchmarks.bench -k hole      只运行名称包含 hole 的项目
+
+每次运行的结果写入 benchmarks/results/，耗时超过基准 threshold 倍的项目视为退化，
+此时返回码为 1，可在上线前的检查中使用
+'''
+import argparse
+import json
+import os
+import platform
+import struct
+import sys
+import tempfile
+import time
+import numpy as np
+
+from script.modbus import calc_crc16, build_modbus_cmd
+from script.receiver import DistanceReader
+from script.hole_detector import HoleDetector
+from script.recording import RecordingWriter, open_recording
+from script.pyramid import build_pyramid, PyramidView
+from script.simulator import SimulatedSensor, synthetic_trace
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+# 每个基准函数接收一个临时目录（运行结束后删除），
+# 返回 (操作次数, 计时函数[, 附加信息])，计时函数执行一次全部操作
+
+@benchmark("crc_frame_encode_decode")
+def bench_crc_frame(tmpdir):
+    n = 20000
+    resp = struct.pack('>BBBI', 1, 4, 4, 123456)
+    resp += struct.pack('<H', calc_crc16(resp))
+
+    def run():
+        for _ in range(n):
+            build_modbus_cmd(0x01, 0x04, 0x0000, 0x0002)
+            calc_crc16(resp[:-2]) == struct.unpack_from('<H', resp, 7)[0]
+            struct.unpack_from('>I', resp, 3)
+    return n, run
+
+@benchmark("read_distance")
+def bench_read_distance(tmpdir):
+    n = 20000
+    reader = DistanceReader(SimulatedSensor(), response_delay=0)
+
+    def run():
+        for _ in range(n):
+            reader.read_one()
+    # 软件路径与波特率无关；各波特率下请求8字节 + 应答9字节的线路传输时间单独列出（不参与比较），
+    # 决定该波特率下的采样率上限
+    wire = {str(baud): SimulatedSensor(baudrate=baud).byte_time(8 + 9) * 1e6
+            for baud in (4800, 9600, 115200)}
+    return n, run, {'wire_us_per_op': wire}
+
+@benchmark("read_distance_batch")
+def bench_read_batch(tmpdir):
+    n = 20000
+    reader = DistanceReader(SimulatedSensor(), batch_size=256, response_delay=0)
+    out = np.empty(256, dtype=np.float64)
+
+    def run():
+        for _ in range(n // 256):
+            reader.read_batch(out, scale=100)
+    return n // 256 * 256, run
+
+@benchmark("history_append")
+def bench_history_append(tmpdir):
+    # 与界面中保留最近100个样本的写法一致
+    n = 200000
+
+    def run():
+        distances = []
+        for i in range(n):
+            distances.append(i / 100)
+            if len(distances) > 100:
+                distances.pop(0)
+    return n, run
+
+@benchmark("hole_detection_1m")
+def bench_hole_detection(tmpdir):
+    trace = synthetic_trace(1_000_000, seed=0).tolist()
+
+    def run():
+        detector = HoleDetector(20.0)
+        for dist in trace:
+            detector.update(dist)
+    return len(trace), run
+
+@benchmark("recording_append")
+def bench_recording_append(tmpdir):
+    n = 500000
+    path = os.path.join(tmpdir, "rec.f32")
+
+    def run():
+        writer = RecordingWriter(path)
+        for i in range(n):
+            writer.append(i)
+        writer.close()
+    return n, run
+
+@benchmark("recording_write_read")
+def bench_recording_rw(tmpdir):
+    trace = synthetic_trace(4_000_000, seed=0)
+    path = os.path.join(tmpdir, "rec.f32")
+
+    def run():
+        writer = RecordingWriter(path)
+        for start in range(0, len(trace), 1 << 16):
+            writer.extend(trace[start:start + (1 << 16)])
+        writer.close()
+        float(open_recording(path).sum())
+    return len(trace), run
+
+@benchmark("plot_decimation")
+def bench_plot_decimation(tmpdir):
+    trace = synthetic_trace(4_000_000, seed=0)
+    path = os.path.join(tmpdir, "rec.f32")
+    writer = RecordingWriter(path)
+    writer.extend(trace)
+    writer.close()
+    build_pyramid(path)
+    view = PyramidView(path)
+    rng = np.random.default_rng(0)
+    windows = [(int(a), int(a) + int(w)) for a, w in
+               zip(rng.integers(0, len(trace), 500), rng.integers(100, len(trace), 500))]
+
+    def run():
+        for x0, x1 in windows:
+            view.fetch(x0, x1, 1200)
+    return len(windows), run
+
+@benchmark("pyramid_build")
+def bench_pyramid_build(tmpdir):
+    trace = synthetic_trace(4_000_000, seed=0)
+    path = os.path.join(tmpdir, "rec.f32")
+    writer = RecordingWriter(path)
+    writer.extend(trace)
+    writer.close()
+
+    def run():
+        build_pyramid(path)
+    return len(trace), run
+
+def run_benchmarks(pattern=None, repeat=3):
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ops, run, *extra = setup(tmpdir)
+            best = float('inf')
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                run()
+                best = min(best, time.perf_counter() - t0)
+            del run  # 释放记录文件的内存映射，临时目录才能删除
+        results[name] = {'ops': ops, 'seconds': best, 'ns_per_op': best / ops * 1e9}
+        if extra:
+            results[name].update(extra[0])
+        print(f"{name:<28}{results[name]['ns_per_op']:>14.1f} ns/op")
+        for baud, us in results[name].get('wire_us_per_op', {}).items():
+            print(f"  线路传输 @{baud:<8}{us:>20.1f} μs/op")
+    return results
+
+def compare(results, baseline, threshold):
+    '''返回退化项目列表 [(名称, 当前ns/op, 基准ns/op)]'''
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = res['ns_per_op'] / base['ns_per_op']
+        flag = "  退化!" if ratio > threshold else ""
+        print(f"{name:<28}{ratio:>8.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append((name, res['ns_per_op'], base['ns_per_op']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量热点路径性能基准")
+    parser.add_argument('-k', dest='pattern', default=None, help="只运行名称包含该字符串的项目")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=1.25, help="超过基准多少倍视为退化")
+    parser.add_argument('--save', action='store_true', help="将本次结果保存为基准")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.pattern, args.repeat)
+    record = {'time': time.strftime("%Y-%m-%d %H:%M:%S"), 'python': platform.python_version(),
+              'machine': platform.node(), 'results': results}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, time.strftime("%Y%m%d_%H%M%S.json")), 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+        print(f"基准已保存到 {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("没有基准文件，使用 --save 生成")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print("\n与基准比较：")
+    regressions = compare(results, baseline, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,8 +9,40 @@ import serial
 import serial.tools.list_ports
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QMessageBox
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QThread, pyqtSignal
 from mainwindow import Ui_MainWindow
+from script.adaptive_rate import AdaptiveRateController
+from script.receiver import DistanceReader
+from script.hole_detector import HoleDetector
+from script.hole_stats import HoleStatistics
+from script.vibration import VibrationMonitor
+from script.recording import RecordingWriter
+from script.triggered_capture import TriggeredCapture
+from script.pyramid import build_pyramid, PyramidView
+from script.shm_ring import AcquisitionProcess
+from script.discovery import discover
+from QCustomPlot_PyQt5 import QCP
+
+class BackgroundTask(QThread):
+    '''
+    在后台线程执行耗时函数（生成金字塔、串口扫描等），避免界面卡顿
+    完成后在界面线程发出 done(结果)，出错时发出 failed(错误信息)
+    '''
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.done.emit(result)
 
 class LaserApp(QtWidgets.QMainWindow):
     def __init__(self):
@@ -28,11 +60,39 @@ class LaserApp(QtWidgets.QMainWindow):
         self.DEVICE_ADDR = 0x01
         self.FUNC_READ = 0x04
         self.FUNC_WRITE = 0x06
+        self.reader = DistanceReader(self.ser, self.DEVICE_ADDR)
 
         self.move_speed_mm_per_sample = 0.3  # 假设位移平台每次采样移动0.2mm
-        self.in_peak = False
-        self.peak_start_index = 0
-        self.peak_max_depth = 0
+        self.detector = HoleDetector(self.baseline)
+        # 整班小孔统计：按日期保存在 data/ 下，清空输出时不重置，重启后继续累计，
+        # 各工位的文件可用 HoleStatistics.merge 合并
+        self.hole_stats_path = os.path.join("data", time.strftime("hole_stats_%Y%m%d.json"))
+        self.hole_stats = HoleStatistics()
+        if os.path.exists(self.hole_stats_path):
+            try:
+                self.hole_stats = HoleStatistics.load(self.hole_stats_path)
+            except (OSError, ValueError, KeyError) as e:
+                self.ui.statusbar.showMessage(f"小孔统计文件无法读取，重新开始统计：{e}")
+        self.vibration = VibrationMonitor(threshold=self.detector.threshold)
+
+        # --high-speed-mode: 进入小孔时同时切换传感器为高速模式
+        self.use_high_speed_mode = '--high-speed-mode' in sys.argv
+        # 高速段不再固定等待应答，读取由串口超时控制，读满一帧即返回，
+        # 采样间隔取 0，实际采样率由单次收发耗时决定
+        self.rate_ctrl = AdaptiveRateController(
+            slow_interval=100, fast_interval=0,
+            set_mode=self.set_mode if self.use_high_speed_mode else None)
+
+        self.recorder = None   # 正在写入的记录
+        self.tasks = []        # 运行中的后台任务，退出前等待完成
+        self.view = None       # 回看记录时的金字塔视图
+        # --triggered: 只记录检测到小孔前后的窗口和抽稀的上下文
+        self.use_triggered_capture = '--triggered' in sys.argv
+
+        # --acq-process: 在独立进程中采集，经共享内存环形缓冲区传给界面
+        self.use_acq_process = '--acq-process' in sys.argv
+        self.acq = None
+        self.acq_seq = 0
 
         self.ui.OpenorClose.clicked.connect(self.open_serial)
         self.ui.readDistance.clicked.connect(self.toggle_read_distance)
@@ -40,6 +100,7 @@ class LaserApp(QtWidgets.QMainWindow):
         self.ui.calculateDepth.clicked.connect(self.toggle_depth_calc)
         self.ui.clearScreen.clicked.connect(self.clear_data)
         self.ui.quit.clicked.connect(self.close)
+        self.ui.data_save.clicked.connect(self.toggle_recording)
 
         self.timer.timeout.connect(self.read_and_plot)
 
@@ -52,9 +113,32 @@ class LaserApp(QtWidgets.QMainWindow):
         for port in ports:
             self.ui.portId.addItem(port.device)
 
+        # 自动发现传感器（优先验证上次成功的配置），在后台线程扫描，
+        # 完成后选中响应的端口、波特率和地址
+        self.ui.statusbar.showMessage("正在搜索传感器...")
+        self.start_task(discover, [port.device for port in ports], on_done=self.on_sensors_discovered)
+
+    def on_sensors_discovered(self, sensors):
+        if not sensors:
+            self.ui.statusbar.showMessage("未发现传感器，请手动选择串口")
+            return
+        sensor = sensors[0]
+        msg = f"发现传感器 {sensor['port']} @ {sensor['baudrate']}bps 地址 {sensor['address']}"
+        if self.ser.is_open or self.acq is not None:
+            self.ui.statusbar.showMessage(msg)  # 扫描期间已手动打开串口，不再改动
+            return
+        self.ui.portId.setCurrentText(sensor['port'])
+        self.ui.baudRate.setCurrentText(str(sensor['baudrate']))
+        self.DEVICE_ADDR = sensor['address']
+        self.reader = DistanceReader(self.ser, self.DEVICE_ADDR)
+        self.ui.statusbar.showMessage(msg)
+
     def open_serial(self):
         port = self.ui.portId.currentText()
         baudrate = int(self.ui.baudRate.currentText())
+        if self.use_acq_process:
+            self.start_acq_process(port, baudrate)
+            return
         try:
             if self.ser.is_open:
                 self.ser.close()
@@ -68,6 +152,40 @@ class LaserApp(QtWidgets.QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "串口错误", str(e))
 
+    def start_acq_process(self, port, baudrate):
+        if self.acq is not None:
+            self.acq.stop()
+        self.acq = AcquisitionProcess(port, baudrate, address=self.DEVICE_ADDR)
+        self.acq.start()
+        self.acq_seq = 0
+        QMessageBox.information(self, "串口状态", f"采集进程已打开串口 {port} @ {baudrate}bps")
+
+    def closeEvent(self, event):
+        if self.acq is not None:
+            self.acq.stop()
+            self.acq = None
+        if self.recorder is not None:
+            self.recorder.close()
+        self.save_hole_stats()
+        for task in self.tasks:
+            task.wait()
+        super().closeEvent(event)
+
+    def start_task(self, func, *args, on_done=None):
+        '''在后台线程执行 func(*args)，完成后在界面线程调用 on_done(结果)'''
+        task = BackgroundTask(func, *args, parent=self)
+        if on_done is not None:
+            task.done.connect(on_done)
+        task.failed.connect(lambda msg: QMessageBox.warning(self, "错误", msg))
+        task.finished.connect(lambda: self.tasks.remove(task))
+        self.tasks.append(task)
+        task.start()
+        return task
+
+    def save_hole_stats(self):
+        os.makedirs("data", exist_ok=True)
+        self.hole_stats.save(self.hole_stats_path)
+
     def calc_crc16(self, data: bytes) -> int:
         crc = 0xFFFF
         for pos in data:
@@ -90,16 +208,29 @@ class LaserApp(QtWidgets.QMainWindow):
         return self.ser.read(expected_len)
 
     def read_distance(self):
-        self.send_modbus_cmd(self.FUNC_READ, 0x0000, 0x0002)
-        resp = self.read_response(9)
-        if len(resp) == 9 and resp[1] == self.FUNC_READ:
-            high = resp[3] << 8 | resp[4]
-            low = resp[5] << 8 | resp[6]
-            return (high << 16) | low
-        return None
+        if self.acq is not None:
+            rec = self.acq.ring.latest()
+            return int(rec['dist']) if rec is not None else None
+        self.reader.response_delay = 0 if self.rate_ctrl.fast else 0.05
+        return self.reader.read_one()
+
+    def write_register(self, addr, value):
+        msg = struct.pack('>B B H H', self.DEVICE_ADDR, self.FUNC_WRITE, addr, value)
+        crc = self.calc_crc16(msg)
+        msg += struct.pack('<H', crc)
+        self.ser.write(msg)
+        resp = self.read_response(8)
+        return len(resp) == 8 and resp[1] == self.FUNC_WRITE
+
+    def set_mode(self, value):
+        """0: 标准，1: 高速，2: 高精度"""
+        return self.write_register(0x0001, value)
 
     def toggle_read_distance(self):
         if not self.plotting:
+            self.view = None
+            if self.acq is not None:
+                self.acq_seq = self.acq.ring.head
             self.distances.clear()
             self.plotting = True
             self.depth_mode = False
@@ -113,48 +244,122 @@ class LaserApp(QtWidgets.QMainWindow):
             QMessageBox.warning(self, "错误", "请先校准基准面！")
             return
         if not self.depth_mode:
+            self.view = None
+            if self.acq is not None:
+                self.acq_seq = self.acq.ring.head
             self.distances.clear()
-            self.in_peak = False
-            self.peak_start_index = 0
-            self.peak_max_depth = 0
+            self.detector = HoleDetector(self.baseline)
             self.plotting = True
             self.depth_mode = True
-            self.timer.start(100)
+            self.rate_ctrl.reset()
+            self.timer.start(self.rate_ctrl.interval)
         else:
             self.depth_mode = False
             self.plotting = False
             self.timer.stop()
+            self.rate_ctrl.reset()
 
     def read_and_plot(self):
-        dist = self.read_distance()
-        if dist is not None:
-            dist /= 100
-            self.distances.append(dist)
-            if len(self.distances) > 100:
-                self.distances.pop(0)
+        if self.acq is not None:
+            records, self.acq_seq = self.acq.ring.read_since(self.acq_seq)
+            dists = (records['dist'] / 100).tolist()
+            times = records['t']
+        else:
+            dist = self.read_distance()
+            dists = [] if dist is None else [dist / 100]
+            times = [time.time()] * len(dists)
+        flat = [self.process_sample(dist) for dist in dists]
+        if dists:
             self.update_plot()
+            # 基准面上的振动分析，只送入平面样本（小孔的周期性会被误认为振动），
+            # 剔除样本和采样率切换造成的间隔变化由监测器按时间戳识别，不会混入同一分析窗口；
+            # 超出小孔阈值容许范围时在状态栏提示
+            flat_dists = [d for d, f in zip(dists, flat) if f]
+            flat_times = [t for t, f in zip(times, flat) if f]
+            if flat_dists and self.vibration.update(flat_dists, flat_times) is not None:
+                self.ui.statusbar.showMessage(self.vibration.format())
+
+    def process_sample(self, dist):
+        '''处理一个样本(mm)，返回该样本是否位于基准面上（未进入小孔）'''
+        if self.recorder is not None:
+            self.recorder.append(dist)
+        self.distances.append(dist)
+        if len(self.distances) > 100:
+            self.distances.pop(0)
+
+        if self.depth_mode:
+            deviation = dist - self.baseline
+
+            # 偏差上升时提高采样率，特征结束后恢复；独立采集进程始终全速采样，
+            # 界面进程也没有打开串口，不做速率控制和模式切换
+            if self.acq is None:
+                interval = self.rate_ctrl.update(deviation)
+                if interval != self.timer.interval():
+                    self.timer.setInterval(interval)
+
+            hole = self.detector.update(dist)  # 深度大于1mm，认为是小孔开始
+            if hole is not None:
+                peak_width_mm = hole.width_samples * self.move_speed_mm_per_sample
+                depth = hole.depth
+                #ratio = depth / peak_width_mm if peak_width_mm > 0 else 0
+                ratio = hole.ratio
+                #result = f"宽度: {peak_width_mm:.2f} mm\n深度: {depth:.2f} mm\n深径比: {ratio:.2f}"
+                result = f"宽度: {self.detector.diameter_mm:.2f} mm\n深度: {depth:.2f} mm\n深径比: {ratio:.2f}"
+                self.hole_stats.update(hole)
+                self.save_hole_stats()
+                self.ui.textBrowser.setText(result + "\n\n" + self.hole_stats.format())
 
-            if self.depth_mode:
-                index = len(self.distances) - 1
-                deviation = dist - self.baseline
-
-                if deviation > 1:  # 深度大于2mm，认为是小孔开始
-                    if not self.in_peak:
-                        self.peak_start_index = index
-                        self.peak_max_depth = deviation
-                        self.in_peak = True
-                    else:
-                        self.peak_max_depth = max(self.peak_max_depth, deviation)
-                elif self.in_peak:
-                    peak_width_samples = index - self.peak_start_index
-                    peak_width_mm = peak_width_samples * self.move_speed_mm_per_sample
-                    depth = self.peak_max_depth
-                    #ratio = depth / peak_width_mm if peak_width_mm > 0 else 0
-                    ratio = depth / 0.48
-                    #result = f"宽度: {peak_width_mm:.2f} mm\n深度: {depth:.2f} mm\n深径比: {ratio:.2f}"
-                    result = f"宽度: 0.48 mm\n深度: {depth:.2f} mm\n深径比: {ratio:.2f}"
-                    self.ui.textBrowser.setText(result)
-                    self.in_peak = False
+        if self.baseline is None:
+            return False
+        return dist - self.baseline <= self.detector.threshold and not self.detector.in_peak
+
+    def toggle_recording(self):
+        if self.recorder is None:
+            os.makedirs("data", exist_ok=True)
+            if self.use_triggered_capture:
+                if self.baseline is None:
+                    QMessageBox.warning(self, "错误", "请先校准基准面！")
+                    return
+                prefix = os.path.join("data", time.strftime("capture_%Y%m%d_%H%M%S"))
+                self.recorder = TriggeredCapture(prefix, self.baseline)
+            else:
+                path = os.path.join("data", time.strftime("recording_%Y%m%d_%H%M%S.f32"))
+                self.recorder = RecordingWriter(path)
+            self.ui.data_save.setText("停止记录")
+        else:
+            self.recorder.close()
+            recorder = self.recorder
+            self.recorder = None
+            self.ui.data_save.setText("保存文件")
+            if isinstance(recorder, TriggeredCapture):
+                self.ui.statusbar.showMessage(f"已记录 {recorder.window_count} 个特征窗口，共 {recorder.seq} 个样本")
+                return
+            # 长记录的金字塔生成需要数秒，放到后台线程，完成后再进入回看
+            self.ui.statusbar.showMessage(f"正在生成回看数据：{recorder.path}")
+            self.start_task(build_pyramid, recorder.path,
+                            on_done=lambda _, path=recorder.path: self.on_pyramid_built(path))
+
+    def on_pyramid_built(self, path):
+        self.ui.statusbar.showMessage(f"记录已保存：{path}")
+        if not self.plotting:
+            self.browse_recording(path)
+
+    def browse_recording(self, path):
+        '''
+        回看整段记录：拖动/缩放横轴时按屏幕分辨率从金字塔读取可见片段
+        '''
+        self.view = PyramidView(path)
+        self.ui.customPlot.xAxis.setRange(0, max(100, len(self.view)))
+        self.on_range_changed(self.ui.customPlot.xAxis.range())
+
+    def on_range_changed(self, new_range):
+        if self.view is None or self.plotting:
+            return
+        x, y = self.view.fetch(new_range.lower, new_range.upper, self.ui.customPlot.width())
+        self.ui.customPlot.graph(0).setData(x, y)
+        if len(y):
+            self.ui.customPlot.yAxis.setRange(y.min() - 10, y.max() + 10)
+        self.ui.customPlot.replot()
 
     def calibrate_baseline(self):
         samples = []
@@ -177,6 +382,9 @@ class LaserApp(QtWidgets.QMainWindow):
         self.ui.customPlot.yAxis.setLabel("距离 (mm)")
         self.ui.customPlot.xAxis.setRange(0, 100)
         self.ui.customPlot.yAxis.setRange(0, 2000)
+        self.ui.customPlot.setInteraction(QCP.iRangeDrag, True)
+        self.ui.customPlot.setInteraction(QCP.iRangeZoom, True)
+        self.ui.customPlot.xAxis.rangeChanged.connect(self.on_range_changed)
         self.ui.customPlot.replot()
 
     def update_plot(self):
@@ -189,6 +397,7 @@ class LaserApp(QtWidgets.QMainWindow):
         self.ui.customPlot.replot()
 
     def clear_data(self):
+        self.view = None
         self.distances.clear()
         self.ui.textEdit.clear()
         self.ui.textBrowser.clear()
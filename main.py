@@ -5,6 +5,11 @@ import keyboard
 import matplotlib.pyplot as plt
 import numpy as np
 from script.laser_detecting import read_distance 
+from script.qc_store import QCStore, QCRun, Tolerance
+from script.golden_scan import GoldenRegistry
+from script.dual_sensor import DualSensorReader
+from script.LaserSensorCmd import ser
+from script.characterize import characterize
 
 class LaserMenu:
     def __init__(self):
@@ -17,6 +22,9 @@ class LaserMenu:
         print("2. 计算深度范围（最小-最大差值）并绘图")
         print("3. 校准基准面")
         print("4. 读取当前基准面距离")
+        print("5. 生产QC模式")
+        print("6. 双传感器厚度/台阶测量")
+        print("7. 传感器模式标定")
         print("q. 退出程序")
         print("===================================")
 
@@ -32,6 +40,12 @@ class LaserMenu:
                 self.calibrate_baseline()
             elif choice == '4':
                 self.get_baseline()
+            elif choice == '5':
+                self.run_qc()
+            elif choice == '6':
+                self.measure_dual()
+            elif choice == '7':
+                self.characterize_modes()
             elif choice == 'q':
                 print("退出程序，再见！")
                 self.__running = False
@@ -128,6 +142,78 @@ class LaserMenu:
         else:
             print("⚠ 初始化失败，未能读取到有效数据")
 
+    def run_qc(self):
+        if self.__baseline is None:
+            print("⚠ 请先进行基准距离初始化")
+            return
+        # 默认公差：深度 1.5~2.5 mm，可按产品修改
+        tolerance = Tolerance(depth_min=1.5, depth_max=2.5)
+        part_type = input("请输入产品型号：").strip() or None
+        expected = input("请输入每件孔数（留空不检查）：").strip()
+        store = QCStore()
+        registry = GoldenRegistry()
+        golden = registry.load(part_type) if part_type else None
+        if part_type and golden is None:
+            print("⚠ 该型号没有标准扫描，可在测量后将合格件保存为标准扫描")
+        qc = QCRun(store, read_distance, self.__baseline, tolerance, part_type,
+                   expected_holes=int(expected) if expected else None, golden=golden)
+        try:
+            while True:
+                part_id = input("\n请输入工件编号（留空结束QC）：").strip()
+                if not part_id:
+                    break
+                print("正在测量，按下 q 键结束该工件...")
+                result, holes = qc.measure_part(part_id, lambda: keyboard.is_pressed('q'))
+                for i, (hole, width_mm, hole_result, reason) in enumerate(holes):
+                    print(f"  孔{i + 1}: 深度 {hole.depth:.2f} mm，深径比 {hole.ratio:.2f}，{hole_result}"
+                          + (f"（{reason}）" if reason else ""))
+                cmp = qc.last_comparison
+                if cmp is not None:
+                    print(f"  与标准扫描对齐偏移 {cmp.shift} 个样本，最大偏差 {cmp.max_abs_diff:.2f} mm，"
+                          f"缺失 {len(cmp.missing)} 个孔，多余 {len(cmp.extra)} 个孔")
+                print(f"工件 {part_id}：{len(holes)} 个孔，结果 {result}")
+                if part_type and qc.golden is None and result == "PASS" \
+                        and input("是否保存为该型号的标准扫描？(y/n)：").strip().lower() == 'y':
+                    registry.save(part_type, qc.last_samples, self.__baseline)
+                    qc.golden = registry.load(part_type)
+        finally:
+            print(f"本次汇总：{store.summary(time.time() - 24 * 3600)}")
+            store.close()
+
+    def measure_dual(self):
+        mode = 'step' if input("模式（1: 上下对射测厚度，2: 并排测台阶）：").strip() == '2' else 'thickness'
+        offset = float(input("请输入偏置（对射时为两测头零点间距，mm）：").strip() or 0)
+        # 两个测头挂在同一总线上，从站地址分别为 1 和 2
+        dual = DualSensorReader(ser, 0x01, address_b=0x02, offset_mm=offset, mode=mode)
+        name = "厚度" if mode == 'thickness' else "台阶高度"
+        print("按下 Ctrl+C 停止测量")
+        try:
+            for sample in dual.stream():
+                print(f"{name}：{sample.value:.3f} mm（d1={sample.d1:.2f}, d2={sample.d2:.2f}）")
+        except KeyboardInterrupt:
+            print("\n已停止测量")
+
+    def characterize_modes(self):
+        required = float(input("请输入要求的深度分辨率（mm，默认0.05）：").strip() or 0.05)
+        force = input("是否重新标定（忽略缓存）？(y/n)：").strip().lower() == 'y'
+        print("正在标定，请保持传感器对准参考平面...")
+        entry = characterize(ser, required_resolution_mm=required, use_cache=not force)
+        for r in entry['results']:
+            tag = "实测" if r['measured'] else "推算"
+            print(f"  {r['mode_name']} @ {r['baudrate']}bps（{tag}）：{r['throughput_hz']:.1f} Hz，"
+                  f"延迟P50 {r['latency_ms']['p50']:.1f} ms，分辨率 {r['resolution_mm']:.4f} mm")
+        best = entry['recommended']
+        if best is None:
+            print(f"⚠ 当前 {ser.baudrate}bps 下没有满足分辨率要求的模式，已恢复原模式")
+        elif entry['applied']:
+            print(f"✅ 推荐并已设置：{best['mode_name']}模式（{best['throughput_hz']:.1f} Hz）")
+        else:
+            print(f"⚠ 推荐{best['mode_name']}模式，但写入传感器失败")
+        advice = entry['advice']
+        if advice is not None:
+            print(f"  建议：在传感器上将波特率改为 {advice['baudrate']}bps 并使用{advice['mode_name']}模式，"
+                  f"推算吞吐率 {advice['throughput_hz']:.1f} Hz（未实测，需手动修改）")
+
     def get_baseline(self):
         if self.__baseline is None:
             print("⚠ 请先进行基准距离初始化")
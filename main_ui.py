@@ -7,14 +7,17 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import QTimer
 from mainwindow import Ui_MainWindow
-from script.laser_detecting import read_distance
 import serial.tools.list_ports
 
 class LaserApp(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(self, read_distance=None, read_pending=None):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
+        if read_distance is None:
+            from script.laser_detecting import read_distance
+        self.read_distance = read_distance  # 直接读串口，或通过采集代理读取
+        self.read_pending = read_pending    # 可选：一次取出全部未读样本（采集代理）
         self.serial = None
         self.timer = QTimer(self)
         self.plotting = False
@@ -77,12 +80,15 @@ class LaserApp(QtWidgets.QMainWindow):
             self.timer.stop()
 
     def read_and_plot(self):
-        dist = read_distance()
-        if dist is not None:
-            dist /= 100
-            self.distances.append(dist)
-            if len(self.distances) > 100:
-                self.distances.pop(0)
+        if self.read_pending is not None:
+            dists = self.read_pending()
+        else:
+            dist = self.read_distance()
+            dists = [] if dist is None else [dist]
+        for dist in dists:
+            self.distances.append(dist / 100)
+        if dists:
+            del self.distances[:-100]
             self.update_plot()
 
             if self.depth_mode:
@@ -93,7 +99,7 @@ class LaserApp(QtWidgets.QMainWindow):
     def calibrate_baseline(self):
         samples = []
         for _ in range(50):
-            dist = read_distance()
+            dist = self.read_distance()
             if dist is not None:
                 samples.append(dist / 100)
             time.sleep(0.1)
@@ -131,6 +137,13 @@ class LaserApp(QtWidgets.QMainWindow):
 
 if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
-    window = LaserApp()
+    read_distance = read_pending = None
+    if '--broker' in sys.argv:
+        # python main_ui.py --broker 127.0.0.1:8765  通过采集代理读取，不占用串口
+        from script.broker_client import BrokerClient
+        client = BrokerClient.from_address(sys.argv[sys.argv.index('--broker') + 1])
+        read_distance = client.read_distance
+        read_pending = client.read_pending
+    window = LaserApp(read_distance, read_pending)
     window.show()
     sys.exit(app.exec_())
@@ -1,7 +1,7 @@
 import serial
 import platform
-import struct
 import time
+from .modbus import calc_crc16, build_modbus_cmd
 
 if platform.system() == "Windows":
     SERIAL_PORT = "COM4"
@@ -12,22 +12,8 @@ else:
 
 ser = serial.Serial(SERIAL_PORT, baudrate=9600, bytesize=8, parity='N', stopbits=1, timeout=0.1)
 
-def calc_crc16(data: bytes) -> int:
-    crc = 0xFFFF
-    for pos in data:
-        crc ^= pos
-        for _ in range(8):
-            lsb = crc & 0x0001
-            crc >>= 1
-            if lsb:
-                crc ^= 0xA001
-    return crc
-
 def send_modbus_cmd(address: int, func: int, reg_addr: int, reg_num: int) -> None:
-    msg = struct.pack('>B B H H', address, func, reg_addr, reg_num)
-    crc = calc_crc16(msg)
-    msg += struct.pack('<H', crc)  # 小端序CRC
-    ser.write(msg)
+    ser.write(build_modbus_cmd(address, func, reg_addr, reg_num))
 
 def read_response(expected_len: int) -> bytes:
     time.sleep(0.05)
@@ -0,0 +1,48 @@
+class AdaptiveRateController:
+    '''
+    根据与基准面的偏差自适应调整采样间隔
+    平面上低速采样，偏差开始上升（进入小孔）时切换到最高采样率，
+    特征结束并保持一段时间后恢复低速
+    '''
+
+    def __init__(self, slow_interval=100, fast_interval=10, rise_threshold=0.3,
+                 hold_samples=10, set_mode=None, normal_mode=0, fast_mode=1):
+        self.slow_interval = slow_interval    # 平面采样间隔(ms)
+        self.fast_interval = fast_interval    # 特征区采样间隔(ms)
+        self.rise_threshold = rise_threshold  # 偏差超过该值(mm)即切换为高速
+        self.hold_samples = hold_samples      # 偏差回落后继续保持高速的采样数
+        self.set_mode = set_mode              # 可选：切换传感器模式的函数，如 set_mode(1)
+        self.normal_mode = normal_mode
+        self.fast_mode = fast_mode
+        self.fast = False
+        self.quiet_count = 0
+
+    @property
+    def interval(self):
+        return self.fast_interval if self.fast else self.slow_interval
+
+    def update(self, deviation):
+        '''
+        输入当前偏差(mm)，返回下一次采样间隔(ms)
+        '''
+        if abs(deviation) >= self.rise_threshold:
+            self.quiet_count = 0
+            if not self.fast:
+                self._switch(True)
+        elif self.fast:
+            self.quiet_count += 1
+            if self.quiet_count >= self.hold_samples:
+                self._switch(False)
+        return self.interval
+
+    def reset(self):
+        '''恢复低速采样（及传感器标准模式）'''
+        if self.fast:
+            self._switch(False)
+        self.quiet_count = 0
+
+    def _switch(self, fast):
+        self.fast = fast
+        self.quiet_count = 0
+        if self.set_mode is not None:
+            self.set_mode(self.fast_mode if fast else self.normal_mode)
@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+from .hole_detector import HoleDetector
+
+DEFAULT_PORT = 8765
+
+class _Subscriber:
+    '''单个订阅者：有界发送队列，满时丢弃最旧的消息，不阻塞采集'''
+
+    def __init__(self, writer, max_queue):
+        self.writer = writer
+        self.queue = asyncio.Queue(max_queue)
+        self.dropped = 0
+
+    def offer(self, line):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(line)
+
+class AcquisitionBroker:
+    '''
+    采集代理：独占串口，通过 read_distance 持续采样，
+    把带时间戳的批量样本和检测到的小孔以 JSON 行的形式推送给本机任意多个订阅者
+
+    sources 为 {名称: read_distance 函数}，每个数据源一个采集线程
+    消息格式：
+        {"type": "samples", "source": 名称, "t": [时间戳...], "d": [原始距离(0.01mm)...]}
+        {"type": "hole", "source": 名称, "t": 时间戳, "depth": mm, "ratio": 深径比, ...}
+    '''
+
+    def __init__(self, sources, host='127.0.0.1', port=DEFAULT_PORT, batch_size=32,
+                 batch_interval=0.05, max_queue=256, baseline=None, threshold=1.0):
+        self.sources = sources
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval  # 批次最长等待时间(s)
+        self.max_queue = max_queue
+        self.baseline = baseline              # 给定基准面(mm)时同时做小孔检测
+        self.threshold = threshold
+        self.subscribers = set()
+        self.running = False
+        self._loop = None
+        self._threads = []
+
+    def _publish(self, msg):
+        line = (json.dumps(msg, separators=(',', ':')) + '\n').encode('utf-8')
+        for sub in self.subscribers:
+            sub.offer(line)
+
+    def _acquire(self, name, read_distance):
+        detector = HoleDetector(self.baseline, self.threshold) if self.baseline is not None else None
+        times, dists = [], []
+        batch_start = time.time()
+        while self.running:
+            dist = read_distance()
+            now = time.time()
+            if dist is not None:
+                times.append(now)
+                dists.append(dist)
+                if detector is not None:
+                    hole = detector.update(dist / 100)
+                    if hole is not None:
+                        msg = dict(hole._asdict(), type='hole', source=name, t=now)
+                        self._loop.call_soon_threadsafe(self._publish, msg)
+            if dists and (len(dists) >= self.batch_size or now - batch_start >= self.batch_interval):
+                msg = {'type': 'samples', 'source': name, 't': times, 'd': dists}
+                self._loop.call_soon_threadsafe(self._publish, msg)
+                times, dists = [], []
+                batch_start = now
+
+    async def _serve_client(self, reader, writer):
+        sub = _Subscriber(writer, self.max_queue)
+        self.subscribers.add(sub)
+        try:
+            while True:
+                line = await sub.queue.get()
+                writer.write(line)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(sub)
+            writer.close()
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.running = True
+        for name, read_distance in self.sources.items():
+            t = threading.Thread(target=self._acquire, args=(name, read_distance), daemon=True)
+            t.start()
+            self._threads.append(t)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.running = False
+
+    def run(self):
+        asyncio.run(self.serve())
+
+def main():
+    parser = argparse.ArgumentParser(description='激光测距采集代理')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--baseline', type=float, default=None, help='基准面距离(mm)，给定时推送小孔检测结果')
+    parser.add_argument('--threshold', type=float, default=1.0)
+    args = parser.parse_args()
+
+    from .laser_detecting import read_distance
+    broker = AcquisitionBroker({'sensor': read_distance}, args.host, args.port,
+                               baseline=args.baseline, threshold=args.threshold)
+    print(f"采集代理已启动 {args.host}:{args.port}")
+    broker.run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import json
+import socket
+import threading
+from collections import deque
+from .broker import DEFAULT_PORT
+
+class BrokerClient:
+    '''
+    采集代理的轻量客户端
+    后台线程接收消息，read_distance 与 laser_detecting.read_distance 用法相同，
+    按到达顺序逐个返回未读样本（单位0.01mm），没有新样本时返回 None；
+    read_pending 一次取出全部未读样本。未读样本超过 history 个时丢弃最旧的
+    '''
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, source=None, history=4096):
+        self.source = source  # 只接收指定数据源，None 表示全部
+        self.samples = deque(maxlen=history)  # (时间戳, 原始距离)
+        self.holes = deque(maxlen=history)
+        self._pending = deque(maxlen=history)  # 未读的原始距离
+        self._lock = threading.Lock()
+        self._sock = socket.create_connection((host, port))
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_address(cls, address, **kwargs):
+        '''address 形如 "host:port"'''
+        host, _, port = address.rpartition(':')
+        return cls(host or '127.0.0.1', int(port), **kwargs)
+
+    def _receive(self):
+        with self._sock.makefile('rb') as f:
+            for line in f:
+                msg = json.loads(line)
+                if self.source is not None and msg.get('source') != self.source:
+                    continue
+                if msg['type'] == 'samples':
+                    with self._lock:
+                        self.samples.extend(zip(msg['t'], msg['d']))
+                        self._pending.extend(msg['d'])
+                elif msg['type'] == 'hole':
+                    self.holes.append(msg)
+
+    def read_distance(self):
+        with self._lock:
+            return self._pending.popleft() if self._pending else None
+
+    def read_pending(self):
+        '''取出全部未读样本，按到达顺序返回列表'''
+        with self._lock:
+            dists = list(self._pending)
+            self._pending.clear()
+        return dists
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
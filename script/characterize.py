@@ -0,0 +1,148 @@
+import json
+import os
+import time
+import numpy as np
+from .modbus import build_modbus_cmd
+from .receiver import DistanceReader
+from .discovery import SUPPORTED_BAUDRATES, probe
+
+MODES = {0: "标准", 1: "高速", 2: "高精度"}
+CACHE_PATH = os.path.join("data", "sensor_modes.json")
+FUNC_WRITE = 0x06
+FRAME_BYTES = 8 + 9  # 读距离请求 + 应答
+
+def _wire_time(baudrate):
+    return FRAME_BYTES * 10 / baudrate
+
+def _set_mode(ser, address, mode):
+    ser.reset_input_buffer()
+    msg = build_modbus_cmd(address, FUNC_WRITE, 0x0001, mode)
+    ser.write(msg)
+    return ser.read(8) == msg  # 写单寄存器的应答与请求相同
+
+def sensor_key(ser, address):
+    return f"{ser.port}@{address}"
+
+def measure_mode(ser, address, n_samples=200, settle=0.2):
+    '''
+    在当前模式下连续读取 n_samples 次（对准基准面），返回吞吐率、延迟分布和噪声
+    '''
+    reader = DistanceReader(ser, address, response_delay=0)
+    time.sleep(settle)  # 等待模式切换稳定
+    latencies = np.empty(n_samples)
+    values = np.empty(n_samples)
+    ok = 0
+    start = time.perf_counter()
+    for i in range(n_samples):
+        t0 = time.perf_counter()
+        dist = reader.read_one()
+        latencies[i] = time.perf_counter() - t0
+        if dist is not None:
+            values[ok] = dist / 100
+            ok += 1
+    elapsed = time.perf_counter() - start
+    values = values[:ok]
+    noise = float(values.std(ddof=1)) if ok > 1 else float('nan')
+    return {
+        'samples': n_samples,
+        'valid': ok,
+        'throughput_hz': ok / elapsed if elapsed > 0 else 0.0,
+        'latency_ms': {q: float(np.percentile(latencies, p) * 1000)
+                       for q, p in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))},
+        'noise_mm': noise,
+        'resolution_mm': 3 * noise,  # 可分辨深度按3σ噪声计
+    }
+
+def _predict(result, measured_baud, baudrate):
+    '''
+    按线路传输时间推算其他波特率下的延迟和吞吐率：设备处理时间不变，只有传输时间随波特率变化
+    吞吐率由实测的平均每样本耗时换算，与实测行口径一致；推算行只作为修改波特率的建议
+    '''
+    delta = _wire_time(baudrate) - _wire_time(measured_baud)
+    predicted = dict(result, measured=False)
+    predicted['latency_ms'] = {'p50': max(0.0, result['latency_ms']['p50'] + delta * 1000)}
+    if result['throughput_hz'] > 0:
+        per_sample = 1.0 / result['throughput_hz'] + delta * result['samples'] / result['valid']
+        predicted['throughput_hz'] = 1.0 / per_sample if per_sample > 0 else 0.0
+    return predicted
+
+def recommend(results, required_resolution_mm, baudrate=None, measured_only=False):
+    '''
+    在满足分辨率要求的组合中选择吞吐率最高的，无满足项时返回 None
+    baudrate 给定时只在该波特率的组合中选择，measured_only 时只选实测的组合
+    '''
+    ok = [r for r in results if r['resolution_mm'] <= required_resolution_mm and r['valid']
+          and (baudrate is None or r['baudrate'] == baudrate)
+          and (r['measured'] or not measured_only)]
+    return max(ok, key=lambda r: r['throughput_hz']) if ok else None
+
+def _recommend_entry(entry, required_resolution_mm, baudrate):
+    '''
+    recommended: 当前波特率下实测的最快合格模式（可直接设置）
+    advice:      修改波特率后推算更快的组合，仅作建议，没有更快的组合时为 None
+    '''
+    best = recommend(entry['results'], required_resolution_mm, baudrate, measured_only=True)
+    advice = recommend(entry['results'], required_resolution_mm)
+    if advice is not None and (advice['measured']
+                               or best is not None and advice['throughput_hz'] <= best['throughput_hz']):
+        advice = None
+    return dict(entry, required_resolution_mm=required_resolution_mm, recommended=best, advice=advice)
+
+def load_cache(ser, address, path=CACHE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get(sensor_key(ser, address))
+    except (OSError, ValueError):
+        return None
+
+def save_cache(ser, address, entry, path=CACHE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache[sensor_key(ser, address)] = entry
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+def characterize(ser, address=0x01, required_resolution_mm=0.05, modes=tuple(MODES),
+                 baudrates=SUPPORTED_BAUDRATES, n_samples=200, apply=True, use_cache=True,
+                 cache_path=CACHE_PATH):
+    '''
+    传感器模式/波特率标定：逐个模式实测吞吐率、延迟分布和基准面噪声，
+    其他波特率按传输时间推算，推荐当前波特率下满足 required_resolution_mm 的最快模式，
+    推算的其他波特率组合更快时作为建议单独给出（波特率需在传感器上手动修改）
+    apply=True 时把推荐模式写入传感器；未写入（apply=False 或无满足项）时恢复原模式
+    结果按 串口@地址 缓存，use_cache 且缓存中有当前波特率的实测结果时直接使用缓存
+    返回 {'results': [...], 'recommended': {...} 或 None, 'advice': {...} 或 None, 'applied': bool}
+    '''
+    entry = load_cache(ser, address, cache_path) if use_cache else None
+    if entry is not None and not any(r['measured'] and r['baudrate'] == ser.baudrate
+                                     for r in entry['results']):
+        entry = None  # 缓存是在其他波特率下测得的，重新标定
+    original_mode = None
+    if entry is None:
+        snapshot = probe(ser, address)
+        original_mode = snapshot['mode'] if snapshot else None
+        results = []
+        for mode in modes:
+            if not _set_mode(ser, address, mode):
+                continue
+            measured = measure_mode(ser, address, n_samples)
+            measured.update(mode=mode, mode_name=MODES.get(mode), baudrate=ser.baudrate, measured=True)
+            results.append(measured)
+            for baudrate in baudrates:
+                if baudrate != ser.baudrate:
+                    results.append(dict(_predict(measured, ser.baudrate, baudrate), baudrate=baudrate))
+        entry = {'time': time.strftime("%Y-%m-%d %H:%M:%S"), 'results': results}
+        entry = _recommend_entry(entry, required_resolution_mm, ser.baudrate)
+        save_cache(ser, address, entry, cache_path)
+    else:
+        entry = _recommend_entry(entry, required_resolution_mm, ser.baudrate)
+
+    best = entry['recommended']
+    applied = apply and best is not None and _set_mode(ser, address, best['mode'])
+    if not applied and original_mode is not None:
+        _set_mode(ser, address, original_mode)  # 标定过程切换过模式，恢复原模式
+    return dict(entry, applied=applied)
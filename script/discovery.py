@@ -0,0 +1,131 @@
+import json
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+import serial
+import serial.tools.list_ports
+from .modbus import calc_crc16, build_modbus_cmd
+
+SUPPORTED_BAUDRATES = (9600, 115200, 4800)
+DEFAULT_ADDRESSES = tuple(range(0x01, 0x05))  # 双测头等多从站总线上的常用地址
+RESPONSE_ALLOWANCE = 0.05  # 传感器处理时间余量(s)，与 read_response 的固定等待一致
+CACHE_PATH = os.path.join("data", "discovery_cache.json")
+FUNC_READ = 0x04
+
+# 与 laser_detecting 中 read_mode 等函数对应的寄存器
+SNAPSHOT_REGISTERS = {
+    'mode': 0x0001,
+    'light_intensity': 0x0002,
+    'threshold': 0x0003,
+    'analog_mode': 0x0004,
+    'laser_status': 0x0005,
+}
+
+def _probe_timeout(baudrate, response_allowance=RESPONSE_ALLOWANCE):
+    '''单次应答超时：请求+应答约20字节的传输时间的两倍，再加传感器处理时间余量'''
+    return response_allowance + 2 * 20 * 10 / baudrate
+
+def _transact(ser, address, reg_addr, reg_num):
+    ser.reset_input_buffer()
+    ser.write(build_modbus_cmd(address, FUNC_READ, reg_addr, reg_num))
+    expected = 5 + 2 * reg_num
+    resp = ser.read(expected)
+    if len(resp) != expected or resp[0] != address or resp[1] != FUNC_READ:
+        return None
+    if calc_crc16(resp[:-2]) != struct.unpack_from('<H', resp, expected - 2)[0]:
+        return None
+    return struct.unpack_from(f'>{reg_num}H', resp, 3)
+
+def probe(ser, address):
+    '''
+    向当前串口参数下的指定从站发起一次读距离请求，应答正确时读取寄存器快照
+    无应答返回 None
+    '''
+    regs = _transact(ser, address, 0x0000, 0x0002)
+    if regs is None:
+        return None
+    snapshot = {'distance': regs[0] << 16 | regs[1]}
+    for name, addr in SNAPSHOT_REGISTERS.items():
+        value = _transact(ser, address, addr, 0x0001)
+        snapshot[name] = value[0] if value is not None else None
+    return snapshot
+
+def scan_port(port, baudrates=SUPPORTED_BAUDRATES, addresses=DEFAULT_ADDRESSES,
+              response_allowance=RESPONSE_ALLOWANCE):
+    '''
+    依次尝试各波特率和从站地址，返回响应的传感器列表
+    同一总线上的设备波特率相同：先在各波特率下只探测第一个地址，有响应时只在该波特率下探测其余地址；
+    都无响应时才在各波特率下探测其余地址（只有非默认地址的从站时）
+    response_allowance 为每次应答在传输时间之外允许的处理时间(s)
+    '''
+    found = []
+    try:
+        ser = serial.Serial(port, baudrate=baudrates[0], bytesize=8, parity='N', stopbits=1,
+                            timeout=_probe_timeout(baudrates[0], response_allowance))
+    except serial.SerialException:
+        return found
+
+    def scan(baudrate, addrs):
+        ser.baudrate = baudrate
+        ser.timeout = _probe_timeout(baudrate, response_allowance)
+        for address in addrs:
+            snapshot = probe(ser, address)
+            if snapshot is not None:
+                found.append({'port': port, 'baudrate': baudrate, 'address': address,
+                              'registers': snapshot})
+
+    try:
+        for baudrate in baudrates:
+            scan(baudrate, addresses[:1])
+            if found:
+                scan(baudrate, addresses[1:])
+                break
+        else:
+            for baudrate in baudrates:
+                scan(baudrate, addresses[1:])
+                if found:
+                    break
+    finally:
+        ser.close()
+    return found
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('sensors', [])
+    except (OSError, ValueError):
+        return []
+
+def save_cache(sensors, path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'time': time.strftime("%Y-%m-%d %H:%M:%S"), 'sensors': sensors}, f,
+                  ensure_ascii=False, indent=2)
+
+def discover(ports=None, baudrates=SUPPORTED_BAUDRATES, addresses=DEFAULT_ADDRESSES,
+             use_cache=True, cache_path=CACHE_PATH, response_allowance=RESPONSE_ALLOWANCE):
+    '''
+    自动发现传感器：各串口并行探测，返回 [{port, baudrate, address, registers}, ...]
+    use_cache 时先只验证上次成功的配置，仍然响应则直接返回，否则重新全量扫描
+    '''
+    if use_cache:
+        verified = []
+        for cached in load_cache(cache_path):
+            verified += scan_port(cached['port'], (cached['baudrate'],), (cached['address'],),
+                                  response_allowance)
+        if verified:
+            save_cache(verified, cache_path)
+            return verified
+
+    if ports is None:
+        ports = [p.device for p in serial.tools.list_ports.comports()]
+    sensors = []
+    if ports:
+        with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+            for found in pool.map(lambda p: scan_port(p, baudrates, addresses, response_allowance),
+                                  ports):
+                sensors += found
+    if sensors:
+        save_cache(sensors, cache_path)
+    return sensors
@@ -0,0 +1,84 @@
+import time
+from collections import deque, namedtuple
+from .receiver import DistanceReader
+
+# 融合后的差分样本：时间戳、两测头距离(mm)、厚度或台阶高度(mm)
+FusedSample = namedtuple('FusedSample', 't d1 d2 value')
+
+class DifferentialFuser:
+    '''
+    双测头样本按时间戳配对
+    每个样本等到另一测头在其之后的样本到达后，用前后两点线性插值得到同一时刻的另一测头距离
+    mode="thickness": 上下对射，厚度 = offset - d1 - d2
+    mode="step":      并排安装，台阶高度 = d2 - d1 + offset
+    两测头的每个样本都会输出一个融合样本，输出速率为两路之和
+    '''
+
+    def __init__(self, offset_mm=0.0, mode='thickness', max_gap=0.5):
+        if mode not in ('thickness', 'step'):
+            raise ValueError(f"未知模式: {mode}")
+        self.offset_mm = offset_mm
+        self.mode = mode
+        self.max_gap = max_gap  # 插值区间超过该时长(s)的样本丢弃
+        self._last = [None, None]
+        self._pending = [deque(), deque()]
+
+    def _value(self, d1, d2):
+        if self.mode == 'thickness':
+            return self.offset_mm - d1 - d2
+        return d2 - d1 + self.offset_mm
+
+    def add(self, head, t, dist):
+        '''
+        加入测头 head(0/1) 在时刻 t 的距离(mm)，返回可以输出的融合样本列表
+        '''
+        other = 1 - head
+        out = []
+        # 另一测头长时间无应答时，超出插值区间的待配对样本已无法使用，直接丢弃
+        for queue in self._pending:
+            while queue and t - queue[0][0] > self.max_gap:
+                queue.popleft()
+        prev = self._last[head]
+        if prev is not None:
+            t0, d0 = prev
+            queue = self._pending[other]
+            while queue and queue[0][0] <= t:
+                to, do = queue.popleft()
+                if to < t0 or t - t0 > self.max_gap:
+                    continue  # 无法插值，丢弃
+                d = d0 + (dist - d0) * ((to - t0) / (t - t0)) if t > t0 else dist
+                d1, d2 = (d, do) if head == 0 else (do, d)
+                out.append(FusedSample(to, d1, d2, self._value(d1, d2)))
+        self._last[head] = (t, dist)
+        self._pending[head].append((t, dist))
+        return out
+
+class DualSensorReader:
+    '''
+    双传感器同步读取：交替读取两个测头，以收发中点为样本时间戳，经 DifferentialFuser 输出差分流
+    同一 RS485 总线上的两个从站共用一个串口；也可以分别传入两个串口
+    response_delay 默认 0，应答读满即返回，两路之间的时间差仅为一次收发耗时
+    '''
+
+    def __init__(self, ser_a, address_a=0x01, ser_b=None, address_b=0x02, offset_mm=0.0,
+                 mode='thickness', response_delay=0):
+        self.readers = (DistanceReader(ser_a, address_a, response_delay=response_delay),
+                        DistanceReader(ser_b if ser_b is not None else ser_a, address_b,
+                                       response_delay=response_delay))
+        self.fuser = DifferentialFuser(offset_mm, mode)
+
+    def read_pair(self):
+        '''交替读取一轮，返回本轮产生的融合样本列表'''
+        out = []
+        for head, reader in enumerate(self.readers):
+            t0 = time.perf_counter()
+            dist = reader.read_one()
+            t1 = time.perf_counter()
+            if dist is not None:
+                out += self.fuser.add(head, (t0 + t1) / 2, dist / 100)
+        return out
+
+    def stream(self, stop=None):
+        '''持续产生融合样本，直到 stop() 返回 True'''
+        while stop is None or not stop():
+            yield from self.read_pair()
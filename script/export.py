@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+
+FACE_DTYPE = np.dtype([('n', 'u1'), ('v', '<i4', (3,))])
+_COUNT_WIDTH = 10  # 头部计数预留宽度，写完后回填
+
+class PlyWriter:
+    '''
+    流式写入二进制 PLY 点云/网格
+    顶点分块写入文件，面片先写入临时文件，关闭时追加并回填头部计数，内存占用恒定
+    '''
+
+    def __init__(self, path, with_faces=False):
+        self.path = path
+        self.n_vertices = 0
+        self.n_faces = 0
+        self._f = open(path, 'wb')
+        self._faces = tempfile.TemporaryFile() if with_faces else None
+        header = ['ply', 'format binary_little_endian 1.0', 'comment laser-detecting scan, unit mm',
+                  'element vertex ' + '0' * _COUNT_WIDTH,
+                  'property float x', 'property float y', 'property float z']
+        if with_faces:
+            header += ['element face ' + '0' * _COUNT_WIDTH, 'property list uchar int vertex_indices']
+        header.append('end_header')
+        self._header = '\n'.join(header) + '\n'
+        self._f.write(self._header.encode('ascii'))
+
+    def write_vertices(self, xyz):
+        xyz = np.ascontiguousarray(xyz, dtype='<f4')
+        self._f.write(xyz.tobytes())
+        self.n_vertices += len(xyz)
+
+    def write_faces(self, faces):
+        rec = np.empty(len(faces), dtype=FACE_DTYPE)
+        rec['n'] = 3
+        rec['v'] = faces
+        self._faces.write(rec.tobytes())
+        self.n_faces += len(faces)
+
+    def close(self):
+        if self._faces is not None:
+            self._faces.seek(0)
+            shutil.copyfileobj(self._faces, self._f)
+            self._faces.close()
+        placeholder = '0' * _COUNT_WIDTH
+        header = self._header.replace('vertex ' + placeholder, 'vertex ' + str(self.n_vertices).rjust(_COUNT_WIDTH))
+        header = header.replace('face ' + placeholder, 'face ' + str(self.n_faces).rjust(_COUNT_WIDTH))
+        self._f.seek(0)
+        self._f.write(header.encode('ascii'))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def line_scan_points(distances, step_mm=0.3, y_mm=0.0, baseline=0.0, chunk=1 << 16):
+    '''
+    单线扫描转点：x 为扫描位移，z = 基准面 - 距离（孔为凹陷），分块产生 (N,3) 数组
+    '''
+    for start in range(0, len(distances), chunk):
+        d = np.asarray(distances[start:start + chunk], dtype=np.float32)
+        xyz = np.empty((len(d), 3), dtype=np.float32)
+        xyz[:, 0] = np.arange(start, start + len(d)) * step_mm
+        xyz[:, 1] = y_mm
+        xyz[:, 2] = baseline - d
+        yield xyz[~np.isnan(d)]
+
+def height_map_points(height_map, baseline=0.0, keep_nan=False):
+    '''高度图逐行转点，默认跳过未测量点'''
+    x = np.arange(height_map.cols, dtype=np.float32) * height_map.step_mm
+    for line in range(height_map.rows):
+        d = height_map.read_line(line)
+        xyz = np.empty((height_map.cols, 3), dtype=np.float32)
+        xyz[:, 0] = x
+        xyz[:, 1] = line * height_map.line_pitch_mm
+        xyz[:, 2] = baseline - d
+        if keep_nan:
+            np.nan_to_num(xyz[:, 2], copy=False, nan=0.0)
+            yield xyz, ~np.isnan(d)
+        else:
+            yield xyz[~np.isnan(d)]
+
+def _grid_faces(line, cols, valid_prev, valid_cur):
+    '''相邻两行之间的三角面片，跳过包含未测量点的三角形'''
+    c = np.arange(cols - 1)
+    a = (line - 1) * cols + c
+    b = a + 1
+    d = line * cols + c
+    e = d + 1
+    t1 = np.stack([a, d, b], axis=1)
+    t2 = np.stack([b, d, e], axis=1)
+    ok1 = valid_prev[:-1] & valid_cur[:-1] & valid_prev[1:]
+    ok2 = valid_prev[1:] & valid_cur[:-1] & valid_cur[1:]
+    return np.concatenate([t1[ok1], t2[ok2]])
+
+def write_xyz(path, chunks):
+    '''写入 XYZ 文本点云，返回点数'''
+    n = 0
+    with open(path, 'w', encoding='ascii') as f:
+        for xyz in chunks:
+            np.savetxt(f, xyz, fmt='%.4f')
+            n += len(xyz)
+    return n
+
+def write_ply(path, chunks):
+    '''写入二进制 PLY 点云，返回点数'''
+    with PlyWriter(path) as ply:
+        for xyz in chunks:
+            ply.write_vertices(xyz)
+    return ply.n_vertices
+
+def export_line_scan(path, distances, step_mm=0.3, baseline=0.0):
+    '''按扩展名(.ply/.xyz)导出单线扫描'''
+    chunks = line_scan_points(distances, step_mm, baseline=baseline)
+    if os.path.splitext(path)[1].lower() == '.xyz':
+        return write_xyz(path, chunks)
+    return write_ply(path, chunks)
+
+def export_height_map(path, height_map, baseline=None, mesh=False):
+    '''
+    按扩展名(.ply/.xyz)导出高度图点云；mesh=True 时导出三角网格 PLY
+    '''
+    if baseline is None:
+        baseline = height_map.estimate_baseline()
+    if not mesh:
+        chunks = height_map_points(height_map, baseline)
+        if os.path.splitext(path)[1].lower() == '.xyz':
+            return write_xyz(path, chunks)
+        return write_ply(path, chunks)
+    with PlyWriter(path, with_faces=True) as ply:
+        valid_prev = None
+        for line, (xyz, valid) in enumerate(height_map_points(height_map, baseline, keep_nan=True)):
+            ply.write_vertices(xyz)
+            if valid_prev is not None:
+                ply.write_faces(_grid_faces(line, height_map.cols, valid_prev, valid))
+            valid_prev = valid
+    return ply.n_vertices
@@ -0,0 +1,128 @@
+import json
+import os
+from collections import namedtuple
+import numpy as np
+from .hole_detector import detect_holes
+
+DEFAULT_GOLDEN_DIR = os.path.join("data", "golden")
+
+# 与标准扫描的比较结果：
+#   shift     新扫描相对标准扫描的偏移（样本数，scan[i + shift] 对应 golden[i]）
+#   score     归一化互相关峰值（1 为完全相同）
+#   diff      标准扫描坐标下逐点差值 scan - golden(mm)，无重叠处为 nan
+#   matched   [(标准孔, 新扫描孔)]，missing 为缺失的标准孔，extra 为多出的孔
+Comparison = namedtuple('Comparison', 'shift score diff max_abs_diff matched missing extra')
+
+class GoldenRegistry:
+    '''
+    按产品型号保存标准扫描（.npy）及其基准面、阈值参数（.json）
+    '''
+
+    def __init__(self, root=DEFAULT_GOLDEN_DIR):
+        self.root = root
+
+    def _paths(self, part_type):
+        base = os.path.join(self.root, part_type)
+        return base + ".npy", base + ".json"
+
+    def save(self, part_type, profile, baseline=None, threshold=1.0):
+        os.makedirs(self.root, exist_ok=True)
+        profile = np.asarray(profile, dtype=np.float64)
+        if baseline is None:
+            baseline = float(np.nanmedian(profile))
+        npy, meta = self._paths(part_type)
+        np.save(npy, profile)
+        with open(meta, 'w', encoding='utf-8') as f:
+            json.dump({'baseline': baseline, 'threshold': threshold}, f)
+
+    def load(self, part_type):
+        '''返回 (标准扫描, 参数字典)，不存在时返回 None'''
+        npy, meta = self._paths(part_type)
+        if not os.path.exists(npy):
+            return None
+        with open(meta, encoding='utf-8') as f:
+            return np.load(npy), json.load(f)
+
+    def part_types(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.path.splitext(n)[0] for n in os.listdir(self.root) if n.endswith(".npy"))
+
+def align(scan, golden, max_shift=None):
+    '''
+    FFT 互相关求新扫描相对标准扫描的偏移，返回 (shift, 归一化相关峰值)
+    '''
+    a = np.asarray(scan, dtype=np.float64)
+    b = np.asarray(golden, dtype=np.float64)
+    a = np.nan_to_num(a - np.nanmean(a))
+    b = np.nan_to_num(b - np.nanmean(b))
+    n = 1 << int(np.ceil(np.log2(len(a) + len(b) - 1)))
+    corr = np.fft.irfft(np.fft.rfft(a, n) * np.conj(np.fft.rfft(b, n)), n)
+    # corr[k] 对应 shift = k（k < len(a)）或 k - n（负偏移）
+    lags = np.concatenate([np.arange(0, len(a)), np.arange(-(len(b) - 1), 0)])
+    values = np.concatenate([corr[:len(a)], corr[n - (len(b) - 1):]])
+    if max_shift is not None:
+        keep = np.abs(lags) <= max_shift
+        lags, values = lags[keep], values[keep]
+    best = int(np.argmax(values))
+    norm = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    return int(lags[best]), float(values[best] / norm) if norm else 0.0
+
+def difference_profile(scan, golden, shift):
+    '''标准扫描坐标下的逐点差值 scan[i + shift] - golden[i]'''
+    scan = np.asarray(scan, dtype=np.float64)
+    golden = np.asarray(golden, dtype=np.float64)
+    diff = np.full(len(golden), np.nan)
+    lo = max(0, -shift)
+    hi = min(len(golden), len(scan) - shift)
+    if hi > lo:
+        diff[lo:hi] = scan[lo + shift:hi + shift] - golden[lo:hi]
+    return diff
+
+def match_holes(golden_holes, scan_holes, shift, tolerance):
+    '''按孔中心位置（对齐后）匹配，返回 (matched, missing, extra)'''
+    g_centers = np.array([(h.start + h.end) / 2 for h in golden_holes])
+    s_centers = np.array([(h.start + h.end) / 2 - shift for h in scan_holes])
+    matched, used = [], set()
+    missing = []
+    for gh, gc in zip(golden_holes, g_centers):
+        j = -1
+        if len(s_centers):
+            dist = np.abs(s_centers - gc)
+            if used:
+                dist[list(used)] = np.inf
+            j = int(np.argmin(dist))
+            if dist[j] > tolerance:
+                j = -1
+        if j < 0:
+            missing.append(gh)
+        else:
+            used.add(j)
+            matched.append((gh, scan_holes[j]))
+    extra = [h for j, h in enumerate(scan_holes) if j not in used]
+    return matched, missing, extra
+
+def compare_to_golden(scan, golden, baseline=None, threshold=1.0, max_shift=None, position_tolerance=None):
+    '''
+    对齐新扫描与标准扫描，计算差值曲线并检查缺失/多余的小孔
+    baseline 为标准扫描的基准面距离；新扫描的基准面按两者中位数之差修正
+    '''
+    scan = np.asarray(scan, dtype=np.float64)
+    golden = np.asarray(golden, dtype=np.float64)
+    if baseline is None:
+        baseline = float(np.nanmedian(golden))
+    scan_baseline = baseline + float(np.nanmedian(scan) - np.nanmedian(golden))
+    shift, score = align(scan, golden, max_shift)
+    diff = difference_profile(scan, golden, shift)
+    golden_holes = detect_holes(golden, baseline, threshold)
+    scan_holes = detect_holes(scan, scan_baseline, threshold)
+    if position_tolerance is None:
+        widths = [h.width_samples for h in golden_holes]
+        position_tolerance = max(3, max(widths)) if widths else 3
+    matched, missing, extra = match_holes(golden_holes, scan_holes, shift, position_tolerance)
+    # 只在重叠区域内判定缺失/多余
+    lo, hi = max(0, -shift), min(len(golden), len(scan) - shift)
+    missing = [h for h in missing if lo <= h.start and h.end <= hi]
+    extra = [h for h in extra if lo <= h.start - shift and h.end - shift <= hi]
+    max_abs = float(np.nanmax(np.abs(diff))) if np.any(~np.isnan(diff)) else float('nan')
+    return Comparison(shift, score, diff, max_abs, matched, missing, extra)
@@ -0,0 +1,64 @@
+from collections import namedtuple
+import numpy as np
+
+# 检测到的小孔：起止样本序号、宽度(样本数)、最大深度(mm)、深径比
+DetectedHole = namedtuple('DetectedHole', 'start end width_samples depth ratio')
+
+class HoleDetector:
+    '''
+    单线扫描小孔检测
+    偏差 (距离 - 基准面) 超过 threshold 时进入小孔，回落时结束并给出结果
+    '''
+
+    def __init__(self, baseline, threshold=1.0, diameter_mm=0.48):
+        self.baseline = baseline
+        self.threshold = threshold
+        self.diameter_mm = diameter_mm  # 名义孔径，用于计算深径比
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.in_peak = False
+        self.peak_start_index = 0
+        self.peak_max_depth = 0
+
+    def update(self, dist):
+        '''
+        输入一个距离值(mm)，小孔结束时返回 DetectedHole，否则返回 None
+        '''
+        index = self.index
+        self.index += 1
+        deviation = dist - self.baseline
+        if deviation > self.threshold:
+            if not self.in_peak:
+                self.peak_start_index = index
+                self.peak_max_depth = deviation
+                self.in_peak = True
+            else:
+                self.peak_max_depth = max(self.peak_max_depth, deviation)
+        elif self.in_peak:
+            self.in_peak = False
+            depth = self.peak_max_depth
+            return DetectedHole(self.peak_start_index, index, index - self.peak_start_index,
+                                depth, depth / self.diameter_mm)
+        return None
+
+def detect_holes(trace, baseline, threshold=1.0, diameter_mm=0.48):
+    '''
+    整段距离序列(mm)的向量化小孔检测，结果与逐点调用 HoleDetector 相同
+    （末尾未结束的小孔不计入）
+    '''
+    trace = np.asarray(trace, dtype=np.float64)
+    deviation = trace - baseline
+    mask = np.nan_to_num(deviation, nan=0.0) > threshold
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    if len(ends) and ends[-1] == len(trace):
+        starts, ends = starts[:-1], ends[:-1]
+    if not len(starts):
+        return []
+    # 起止点交替作为分段边界，偶数段即各小孔内部
+    bounds = np.column_stack([starts, ends]).ravel()
+    depths = np.maximum.reduceat(np.append(deviation, 0.0), bounds)[::2]
+    return [DetectedHole(int(s), int(e), int(e - s), float(d), float(d) / diameter_mm)
+            for s, e, d in zip(starts, ends, depths)]
@@ -0,0 +1,209 @@
+import json
+import math
+import os
+
+class RunningMoments:
+    '''Welford 算法在线计算均值和方差，可与其他实例合并'''
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def to_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        m = cls()
+        m.n, m.mean, m.m2, m.min, m.max = d['n'], d['mean'], d['m2'], d['min'], d['max']
+        return m
+
+class QuantileSketch:
+    '''
+    可合并的分位数草图（对数分桶，相对误差 relative_accuracy）
+    桶数上限 max_buckets，超过时合并最低的桶，内存占用固定
+    只记录正值，<= 0 的值单独计数
+    '''
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, x):
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def update(self, x):
+        self.count += 1
+        if x <= 0:
+            self.zero_count += 1
+            return
+        key = self._key(x)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for k in keys[:excess]:
+            self.buckets[target] += self.buckets.pop(k)
+
+    def merge(self, other):
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(max(self.buckets))
+
+    def histogram(self, bins=10):
+        '''按草图数据等宽分箱，返回 (边界列表, 计数列表)'''
+        if not self.buckets:
+            return [], []
+        lo = self._value(min(self.buckets))
+        hi = self._value(max(self.buckets))
+        width = (hi - lo) / bins or 1.0
+        counts = [0] * bins
+        for k, c in self.buckets.items():
+            counts[min(bins - 1, int((self._value(k) - lo) / width))] += c
+        return [lo + i * width for i in range(bins + 1)], counts
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'max_buckets': self.max_buckets,
+                'zero_count': self.zero_count, 'count': self.count,
+                'buckets': {str(k): c for k, c in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d['relative_accuracy'], d['max_buckets'])
+        s.zero_count, s.count = d['zero_count'], d['count']
+        s.buckets = {int(k): c for k, c in d['buckets'].items()}
+        return s
+
+class HoleStatistics:
+    '''
+    整班小孔统计：深度和深径比的均值、标准差、分位数和直方图
+    每个小孔 O(1) 更新，内存固定；多个工位或批处理文件的结果可以合并
+    '''
+
+    METRICS = ('depth', 'ratio')
+
+    def __init__(self):
+        self.moments = {m: RunningMoments() for m in self.METRICS}
+        self.sketches = {m: QuantileSketch() for m in self.METRICS}
+
+    @property
+    def count(self):
+        return self.moments['depth'].n
+
+    def update(self, hole):
+        '''hole 为 DetectedHole'''
+        for m in self.METRICS:
+            value = getattr(hole, m)
+            self.moments[m].update(value)
+            self.sketches[m].update(value)
+
+    def merge(self, other):
+        for m in self.METRICS:
+            self.moments[m].merge(other.moments[m])
+            self.sketches[m].merge(other.sketches[m])
+
+    def cpk(self, metric, low=None, high=None):
+        '''过程能力指数，给定一侧或两侧规格限'''
+        mom = self.moments[metric]
+        if mom.n < 2 or mom.std == 0:
+            return math.nan
+        caps = []
+        if low is not None:
+            caps.append((mom.mean - low) / (3 * mom.std))
+        if high is not None:
+            caps.append((high - mom.mean) / (3 * mom.std))
+        return min(caps) if caps else math.nan
+
+    def summary(self, metric='depth'):
+        mom, sk = self.moments[metric], self.sketches[metric]
+        return {'n': mom.n, 'mean': mom.mean, 'std': mom.std, 'min': mom.min, 'max': mom.max,
+                'p50': sk.quantile(0.5), 'p95': sk.quantile(0.95), 'p99': sk.quantile(0.99)}
+
+    def format(self):
+        '''SPC 读数文本'''
+        if self.count == 0:
+            return "统计: 暂无数据"
+        lines = [f"统计: {self.count} 个孔"]
+        for metric, name, unit in (('depth', '深度', ' mm'), ('ratio', '深径比', '')):
+            s = self.summary(metric)
+            lines.append(f"{name}: 均值 {s['mean']:.3f}{unit} σ {s['std']:.3f} "
+                         f"P50 {s['p50']:.3f} P95 {s['p95']:.3f}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {m: {'moments': self.moments[m].to_dict(), 'sketch': self.sketches[m].to_dict()}
+                for m in self.METRICS}
+
+    @classmethod
+    def from_dict(cls, d):
+        stats = cls()
+        for m in cls.METRICS:
+            stats.moments[m] = RunningMoments.from_dict(d[m]['moments'])
+            stats.sketches[m] = QuantileSketch.from_dict(d[m]['sketch'])
+        return stats
+
+    def save(self, path):
+        '''先写临时文件再替换，写入中途断电不会留下不完整的统计文件'''
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -1,4 +1,5 @@
 from .LaserSensorCmd import send_modbus_cmd, read_response, calc_crc16, ser
+from .receiver import DistanceReader
 import matplotlib.pyplot as plt
 import numpy as np
 import struct
@@ -10,18 +11,21 @@ DEVICE_ADDR = 0x01
 FUNC_READ = 0x04
 FUNC_WRITE = 0x06
 
+_reader = DistanceReader(ser, DEVICE_ADDR)
+
 def read_distance():
     '''
     读取距离值
-    返回值: 距离值(单位mm)
+    返回值: 距离值(单位0.01mm)
     '''
-    send_modbus_cmd(DEVICE_ADDR, FUNC_READ, 0x0000, 0x0002)
-    resp = read_response(9)
-    if len(resp) == 9 and resp[1] == FUNC_READ:
-        high = resp[3] << 8 | resp[4]
-        low = resp[5] << 8 | resp[6]
-        return (high << 16) | low
-    return None
+    return _reader.read_one()
+
+def read_distances(out, count=None, scale=None):
+    '''
+    批量读取距离值，直接写入预分配的数组 out
+    返回值: 写入的有效样本数
+    '''
+    return _reader.read_batch(out, count, scale)
 
 def read_mode():
     return _read_single_register(0x0001)
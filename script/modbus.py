@@ -0,0 +1,17 @@
+import struct
+
+def calc_crc16(data: bytes) -> int:
+    crc = 0xFFFF
+    for pos in data:
+        crc ^= pos
+        for _ in range(8):
+            lsb = crc & 0x0001
+            crc >>= 1
+            if lsb:
+                crc ^= 0xA001
+    return crc
+
+def build_modbus_cmd(address: int, func: int, reg_addr: int, reg_num: int) -> bytes:
+    msg = struct.pack('>B B H H', address, func, reg_addr, reg_num)
+    crc = calc_crc16(msg)
+    return msg + struct.pack('<H', crc)  # 小端序CRC
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+from .recording import open_recording
+
+MIN_LEVEL_LEN = 1024
+
+def pyramid_dir(path):
+    return path + '.pyramid'
+
+def _level_path(path, level):
+    return os.path.join(pyramid_dir(path), f'level_{level}.npy')
+
+def _reduce(src, dst, chunk):
+    '''将 src 的 (min, max) 每两项合并写入 dst，src 为一维样本或 (n, 2) 数组'''
+    for start in range(0, len(src), chunk):
+        block = np.asarray(src[start:start + chunk])
+        if block.ndim == 1:
+            block = np.stack([block, block], axis=1)
+        if len(block) % 2:
+            block = np.concatenate([block, block[-1:]])
+        pairs = block.reshape(-1, 2, 2)
+        out = dst[start // 2:start // 2 + len(pairs)]
+        out[:, 0] = pairs[:, :, 0].min(axis=1)
+        out[:, 1] = pairs[:, :, 1].max(axis=1)
+
+def build_pyramid(path, chunk=1 << 20):
+    '''
+    为记录文件构建 min/max 金字塔：第 k 层每项覆盖 2^k 个样本
+    各层以 .npy 形式存放在记录文件旁的 <记录>.pyramid 目录，分块计算，内存占用恒定
+    返回层数
+    '''
+    os.makedirs(pyramid_dir(path), exist_ok=True)
+    src = open_recording(path)
+    level = 0
+    while len(src) > MIN_LEVEL_LEN:
+        level += 1
+        dst = np.lib.format.open_memmap(_level_path(path, level), mode='w+',
+                                        dtype=np.float32, shape=(-(-len(src) // 2), 2))
+        _reduce(src, dst, chunk)
+        dst.flush()
+        src = dst
+    return level
+
+class PyramidView:
+    '''
+    按屏幕分辨率读取记录的可见片段
+    根据可见范围选择合适的金字塔层，只读取该范围内的数据
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.samples = open_recording(path)
+        self.levels = [None]
+        while os.path.exists(_level_path(path, len(self.levels))):
+            self.levels.append(np.load(_level_path(path, len(self.levels)), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.samples)
+
+    def fetch(self, x0, x1, width):
+        '''
+        返回 [x0, x1) 范围内不超过约 2*width 个点的 (x, y)
+        抽稀层返回每个块的 min/max 交替序列，保留尖峰
+        '''
+        x0 = max(0, int(x0))
+        x1 = min(len(self.samples), int(np.ceil(x1)))
+        if x1 <= x0:
+            return np.empty(0), np.empty(0)
+        width = max(1, int(width))
+        level = 0
+        while level + 1 < len(self.levels) and (x1 - x0) >> level > width:
+            level += 1
+        if level == 0:
+            return np.arange(x0, x1, dtype=np.float64), np.asarray(self.samples[x0:x1], dtype=np.float64)
+        b0, b1 = x0 >> level, -(-x1 // (1 << level))
+        block = np.asarray(self.levels[level][b0:b1], dtype=np.float64)
+        x = np.repeat(np.arange(b0, b1, dtype=np.float64) * (1 << level), 2)
+        x[1::2] += (1 << level) / 2
+        return x, block.reshape(-1)
@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from .hole_detector import HoleDetector
+from .golden_scan import compare_to_golden
+
+DEFAULT_DB_PATH = os.path.join("data", "qc.sqlite")
+
+# 公差限，None 表示不检查该项
+Tolerance = namedtuple('Tolerance', 'depth_min depth_max ratio_min ratio_max width_min width_max',
+                       defaults=(None, None, None, None, None, None))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS parts (
+    id INTEGER PRIMARY KEY,
+    part_id TEXT NOT NULL,
+    part_type TEXT,
+    started REAL NOT NULL,
+    finished REAL,
+    hole_count INTEGER,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS holes (
+    id INTEGER PRIMARY KEY,
+    part INTEGER NOT NULL REFERENCES parts(id),
+    idx INTEGER NOT NULL,
+    time REAL NOT NULL,
+    start_sample INTEGER,
+    end_sample INTEGER,
+    width_mm REAL,
+    depth_mm REAL,
+    ratio REAL,
+    result TEXT NOT NULL,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    part INTEGER NOT NULL REFERENCES parts(id),
+    seq INTEGER NOT NULL,
+    time REAL NOT NULL,
+    distance_mm REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_parts_part_id ON parts(part_id);
+CREATE INDEX IF NOT EXISTS idx_parts_started ON parts(started);
+CREATE INDEX IF NOT EXISTS idx_parts_result ON parts(result, started);
+CREATE INDEX IF NOT EXISTS idx_holes_part ON holes(part);
+CREATE INDEX IF NOT EXISTS idx_holes_result ON holes(result, time);
+CREATE INDEX IF NOT EXISTS idx_measurements_part ON measurements(part, seq);
+'''
+
+def evaluate_hole(hole, width_mm, tolerance):
+    '''
+    按公差评定单个小孔，返回 ("PASS"/"FAIL", 原因)
+    '''
+    checks = (('深度', hole.depth, tolerance.depth_min, tolerance.depth_max),
+              ('深径比', hole.ratio, tolerance.ratio_min, tolerance.ratio_max),
+              ('宽度', width_mm, tolerance.width_min, tolerance.width_max))
+    reasons = []
+    for name, value, low, high in checks:
+        if low is not None and value < low:
+            reasons.append(f"{name} {value:.3f} < {low}")
+        if high is not None and value > high:
+            reasons.append(f"{name} {value:.3f} > {high}")
+    return ("FAIL", "; ".join(reasons)) if reasons else ("PASS", None)
+
+class QCStore:
+    '''
+    QC 结果的 SQLite 存储（WAL 模式）
+    小孔和测量值先缓存，按批 executemany 写入，每 commit_every 个工件提交一次
+    '''
+
+    def __init__(self, path=DEFAULT_DB_PATH, commit_every=10, store_measurements=True):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.commit_every = commit_every
+        self.store_measurements = store_measurements
+        self._holes = []
+        self._measurements = []
+        self._uncommitted = 0
+
+    def begin_part(self, part_id, part_type=None):
+        cur = self.conn.execute("INSERT INTO parts (part_id, part_type, started) VALUES (?, ?, ?)",
+                                (part_id, part_type, time.time()))
+        return cur.lastrowid
+
+    def add_hole(self, part, idx, hole, width_mm, result, reason=None):
+        self._holes.append((part, idx, time.time(), hole.start, hole.end, width_mm,
+                            hole.depth, hole.ratio, result, reason))
+
+    def add_measurements(self, part, samples):
+        '''samples 为 (序号, 时间戳, 距离mm) 序列'''
+        if self.store_measurements:
+            self._measurements.extend((part, seq, t, d) for seq, t, d in samples)
+
+    def finish_part(self, part, hole_count, result):
+        self._write_pending()
+        self.conn.execute("UPDATE parts SET finished = ?, hole_count = ?, result = ? WHERE id = ?",
+                          (time.time(), hole_count, result, part))
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def _write_pending(self):
+        if self._holes:
+            self.conn.executemany(
+                "INSERT INTO holes (part, idx, time, start_sample, end_sample, width_mm, depth_mm, ratio, result, reason) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._holes)
+            self._holes.clear()
+        if self._measurements:
+            self.conn.executemany("INSERT INTO measurements VALUES (?, ?, ?, ?)", self._measurements)
+            self._measurements.clear()
+
+    def commit(self):
+        self._write_pending()
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    # ---------- 查询 ----------
+
+    def failing_holes(self, since=None):
+        '''since 之后（默认最近7天）所有不合格小孔'''
+        if since is None:
+            since = time.time() - 7 * 24 * 3600
+        return self.conn.execute(
+            "SELECT p.part_id, h.idx, h.time, h.depth_mm, h.ratio, h.width_mm, h.reason "
+            "FROM holes h JOIN parts p ON p.id = h.part "
+            "WHERE h.result = 'FAIL' AND h.time >= ? ORDER BY h.time", (since,)).fetchall()
+
+    def part_history(self, part_id):
+        return self.conn.execute(
+            "SELECT id, part_type, started, finished, hole_count, result FROM parts "
+            "WHERE part_id = ? ORDER BY started", (part_id,)).fetchall()
+
+    def summary(self, since=None):
+        '''since 之后各结果的工件数 {result: count}'''
+        since = since or 0
+        return dict(self.conn.execute(
+            "SELECT result, COUNT(*) FROM parts WHERE started >= ? GROUP BY result", (since,)).fetchall())
+
+class QCRun:
+    '''
+    生产 QC 模式：逐个测量工件，评定每个小孔并写入 QCStore
+    expected_holes 给定时孔数不符的工件判为不合格
+    golden 为 GoldenRegistry.load 的返回值，给定时每个工件与标准扫描对齐比较，
+    有缺失或多余小孔的工件判为不合格，比较结果保存在 last_comparison
+    '''
+
+    def __init__(self, store, read_distance, baseline, tolerance=Tolerance(), part_type=None,
+                 expected_holes=None, threshold=1.0, move_speed_mm_per_sample=0.3, golden=None):
+        self.store = store
+        self.read_distance = read_distance
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.part_type = part_type
+        self.expected_holes = expected_holes
+        self.threshold = threshold
+        self.move_speed_mm_per_sample = move_speed_mm_per_sample
+        self.golden = golden
+        self.last_comparison = None
+        self.last_samples = None
+
+    def measure_part(self, part_id, stop, max_samples=None):
+        '''
+        测量一个工件直到 stop() 返回 True（或达到 max_samples），返回 (结果, 小孔列表)
+        小孔列表元素为 (DetectedHole, 宽度mm, 结果, 原因)
+        '''
+        self.last_comparison = None
+        part = self.store.begin_part(part_id, self.part_type)
+        detector = HoleDetector(self.baseline, self.threshold)
+        holes = []
+        samples = []
+        seq = 0
+        while not stop() and (max_samples is None or seq < max_samples):
+            dist = self.read_distance()
+            if dist is None:
+                continue
+            dist /= 100
+            samples.append((seq, time.time(), dist))
+            seq += 1
+            hole = detector.update(dist)
+            if hole is not None:
+                width_mm = hole.width_samples * self.move_speed_mm_per_sample
+                result, reason = evaluate_hole(hole, width_mm, self.tolerance)
+                self.store.add_hole(part, len(holes), hole, width_mm, result, reason)
+                holes.append((hole, width_mm, result, reason))
+        self.store.add_measurements(part, samples)
+        self.last_samples = [d for _, _, d in samples]
+
+        failed = any(h[2] == "FAIL" for h in holes)
+        if self.expected_holes is not None and len(holes) != self.expected_holes:
+            failed = True
+        if self.golden is not None and samples:
+            profile, meta = self.golden
+            self.last_comparison = compare_to_golden(self.last_samples, profile, meta['baseline'],
+                                                     meta['threshold'])
+            if self.last_comparison.missing or self.last_comparison.extra:
+                failed = True
+        result = "FAIL" if failed else "PASS"
+        self.store.finish_part(part, len(holes), result)
+        return result, holes
@@ -0,0 +1,211 @@
+import json
+import math
+import os
+from collections import namedtuple
+import numpy as np
+
+# 二维区域中检测到的小孔：中心坐标、深度、等效直径(mm)，面积(mm²)及所在行/列范围
+Hole = namedtuple('Hole', 'x_mm y_mm depth_mm diameter_mm area_mm2 lines positions')
+
+class StageModel:
+    '''
+    位移平台模型：按行（line）扫描，每行 samples_per_line 个采样点
+    step_mm 为行内每次采样的位移，line_pitch_mm 为行间距
+    实际平台在子类中实现 move_to
+    '''
+
+    def __init__(self, n_lines, samples_per_line, step_mm=0.3, line_pitch_mm=0.3, serpentine=False):
+        self.n_lines = n_lines
+        self.samples_per_line = samples_per_line
+        self.step_mm = step_mm
+        self.line_pitch_mm = line_pitch_mm
+        self.serpentine = serpentine  # 蛇形扫描：奇数行反向
+
+    def positions(self):
+        for line in range(self.n_lines):
+            cols = range(self.samples_per_line)
+            if self.serpentine and line % 2:
+                cols = reversed(cols)
+            for pos in cols:
+                yield line, pos
+
+    def position_mm(self, line, pos):
+        return pos * self.step_mm, line * self.line_pitch_mm
+
+    def move_to(self, line, pos):
+        pass
+
+def acquire(stage, read_distance):
+    '''
+    驱动平台逐点扫描，产生 (line, position, distance_mm) 采集流
+    读取失败的点距离为 nan
+    '''
+    for line, pos in stage.positions():
+        stage.move_to(line, pos)
+        dist = read_distance()
+        yield line, pos, (dist / 100 if dist is not None else math.nan)
+
+class HeightMap:
+    '''
+    分块存储的内存映射高度图
+    数据文件为 .npy，形状 (块行数, 块列数, tile, tile)，每个块在文件中连续，
+    因此远大于内存的整件高度图也可按行或区域访问
+    '''
+
+    def __init__(self, path, mm, meta):
+        self.path = path
+        self._mm = mm
+        self.rows = meta['rows']
+        self.cols = meta['cols']
+        self.tile = meta['tile']
+        self.step_mm = meta['step_mm']
+        self.line_pitch_mm = meta['line_pitch_mm']
+
+    @classmethod
+    def create(cls, path, rows, cols, tile=256, step_mm=0.3, line_pitch_mm=0.3):
+        shape = (-(-rows // tile), -(-cols // tile), tile, tile)
+        mm = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+        for ty in range(shape[0]):  # 按块行填充nan，避免一次性占用内存
+            mm[ty] = np.nan
+        meta = {'rows': rows, 'cols': cols, 'tile': tile,
+                'step_mm': step_mm, 'line_pitch_mm': line_pitch_mm}
+        with open(cls._meta_path(path), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return cls(path, mm, meta)
+
+    @classmethod
+    def for_stage(cls, path, stage, tile=256):
+        return cls.create(path, stage.n_lines, stage.samples_per_line, tile,
+                          stage.step_mm, stage.line_pitch_mm)
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        with open(cls._meta_path(path), encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(path, np.load(path, mmap_mode=mode), meta)
+
+    @staticmethod
+    def _meta_path(path):
+        return os.path.splitext(path)[0] + '.json'
+
+    def write(self, line, pos, value):
+        t = self.tile
+        self._mm[line // t, pos // t, line % t, pos % t] = value
+
+    def write_stream(self, samples):
+        '''写入 (line, position, distance) 采集流，返回写入点数'''
+        n = 0
+        for line, pos, dist in samples:
+            self.write(line, pos, dist)
+            n += 1
+        return n
+
+    def write_line(self, line, values, start=0):
+        t = self.tile
+        row = self._mm[line // t, :, line % t, :]
+        c, end = start, start + len(values)
+        while c < end:
+            n = min(t - c % t, end - c)
+            row[c // t, c % t:c % t + n] = values[c - start:c - start + n]
+            c += n
+
+    def read_line(self, line):
+        t = self.tile
+        return self._mm[line // t, :, line % t, :].reshape(-1)[:self.cols]
+
+    def read_region(self, r0, r1, c0, c1):
+        out = np.empty((r1 - r0, c1 - c0), dtype=np.float32)
+        for i, line in enumerate(range(r0, r1)):
+            out[i] = self.read_line(line)[c0:c1]
+        return out
+
+    def estimate_baseline(self):
+        '''以各行中位数的中位数估计基准面距离'''
+        medians = [np.nanmedian(self.read_line(r)) for r in range(self.rows)]
+        return float(np.nanmedian(medians))
+
+    def flush(self):
+        self._mm.flush()
+
+def _runs(mask):
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges[0::2], edges[1::2]
+
+def find_holes(height_map, baseline=None, threshold=1.0, min_area_mm2=0.0):
+    '''
+    逐行流式连通域分析，报告二维区域中所有小孔
+    偏差 (距离 - 基准面) 大于 threshold(mm) 的点视为孔内，只需一行数据常驻内存
+    '''
+    if baseline is None:
+        baseline = height_map.estimate_baseline()
+    step, pitch = height_map.step_mm, height_map.line_pitch_mm
+    parent = []
+    stats = []  # [点数, 最大深度, Σx, Σy, 起始行, 结束行, 起始列, 结束列]
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a == b:
+            return a
+        if stats[a][0] < stats[b][0]:
+            a, b = b, a
+        parent[b] = a
+        sa, sb = stats[a], stats[b]
+        sa[0] += sb[0]
+        sa[1] = max(sa[1], sb[1])
+        sa[2] += sb[2]
+        sa[3] += sb[3]
+        sa[4] = min(sa[4], sb[4])
+        sa[5] = max(sa[5], sb[5])
+        sa[6] = min(sa[6], sb[6])
+        sa[7] = max(sa[7], sb[7])
+        return a
+
+    prev = []
+    for line in range(height_map.rows):
+        deviation = height_map.read_line(line) - baseline
+        starts, ends = _runs(np.nan_to_num(deviation, nan=0.0) > threshold)
+        cur = []
+        j = 0
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            seg = deviation[s:e]
+            label = len(parent)
+            parent.append(label)
+            stats.append([e - s, float(seg.max()), (s + e - 1) * (e - s) / 2,
+                          line * (e - s), line, line, s, e - 1])
+            # 与上一行重叠的游程合并
+            while j < len(prev) and prev[j][1] <= s:
+                j += 1
+            k = j
+            while k < len(prev) and prev[k][0] < e:
+                label = union(label, prev[k][2])
+                k += 1
+            cur.append((s, e, label))
+        prev = cur
+
+    holes = []
+    for i in range(len(parent)):
+        if find(i) != i:
+            continue
+        n, depth, sx, sy, l0, l1, c0, c1 = stats[i]
+        area = n * step * pitch
+        if area < min_area_mm2:
+            continue
+        holes.append(Hole(sx / n * step, sy / n * pitch, depth,
+                          2 * math.sqrt(area / math.pi), area, (l0, l1), (c0, c1)))
+    holes.sort(key=lambda h: (h.y_mm, h.x_mm))
+    return holes
+
+def raster_scan(path, stage, read_distance, tile=256, baseline=None, threshold=1.0):
+    '''
+    二维光栅扫描：驱动平台、写入内存映射高度图，并返回 (高度图, 小孔列表)
+    '''
+    height_map = HeightMap.for_stage(path, stage, tile)
+    height_map.write_stream(acquire(stage, read_distance))
+    height_map.flush()
+    return height_map, find_holes(height_map, baseline, threshold)
@@ -0,0 +1,82 @@
+import struct
+import time
+import numpy as np
+from .modbus import calc_crc16, build_modbus_cmd
+
+FUNC_READ = 0x04
+FRAME_LEN = 9
+
+# 读距离应答帧：地址、功能码、字节数、距离(大端32位)、CRC(小端)
+FRAME_DTYPE = np.dtype([('addr', 'u1'), ('func', 'u1'), ('nbytes', 'u1'),
+                        ('dist', '>u4'), ('crc', '<u2')])
+_DIST = struct.Struct('>I')
+_CRC = struct.Struct('<H')
+
+class DistanceReader:
+    '''
+    低分配的距离接收路径
+    请求帧预先编码，应答经 readinto 写入预分配的 bytearray，解码不再创建中间对象
+    （pyserial 的 readinto 内部仍调用 read，串口层的分配无法避免）
+    Modbus 每次请求只应答一个样本，批量读取仍是逐个收发，
+    只是整批按 NumPy 结构化视图一次解码写入目标数组
+    每次请求前清空输入缓冲区，应答校验从站地址、功能码和 CRC，
+    同一总线上其他从站的应答或残留字节不会被当作本机的样本
+    '''
+
+    def __init__(self, ser, address=0x01, batch_size=256, response_delay=0.05):
+        self.ser = ser
+        self.address = address
+        self.response_delay = response_delay
+        self._request = build_modbus_cmd(address, FUNC_READ, 0x0000, 0x0002)
+        self._frame = bytearray(FRAME_LEN)
+        self._frame_view = memoryview(self._frame)
+        self.resize(batch_size)
+
+    def resize(self, batch_size):
+        self.batch_size = batch_size
+        self._batch = bytearray(FRAME_LEN * batch_size)
+        self._batch_view = memoryview(self._batch)
+        self._frames = np.frombuffer(self._batch, dtype=FRAME_DTYPE)
+        self._ok = np.zeros(batch_size, dtype=bool)
+
+    def _transact(self, view):
+        '''
+        收发一次，应答长度正确且 CRC 校验通过时返回 True
+        '''
+        self.ser.reset_input_buffer()
+        self.ser.write(self._request)
+        if self.response_delay:
+            time.sleep(self.response_delay)
+        if self.ser.readinto(view) != FRAME_LEN:
+            return False
+        return calc_crc16(view[:FRAME_LEN - 2]) == _CRC.unpack_from(view, FRAME_LEN - 2)[0]
+
+    def read_one(self):
+        '''
+        读取单个距离值（原始值，单位0.01mm），失败返回None
+        '''
+        frame = self._frame
+        if self._transact(self._frame_view) and frame[0] == self.address and frame[1] == FUNC_READ:
+            return _DIST.unpack_from(frame, 3)[0]
+        return None
+
+    def read_batch(self, out, count=None, scale=None):
+        '''
+        连续读取 count 个样本并写入 out 数组开头，无效帧被丢弃
+        scale 不为空时写入 原始值/scale（如 scale=100 得到 mm，整数数组按赋值规则截断）
+        返回写入的有效样本数
+        '''
+        if count is None:
+            count = min(len(out), self.batch_size)
+        if count > self.batch_size:
+            self.resize(count)
+        view = self._batch_view
+        ok = self._ok
+        for i in range(count):
+            ok[i] = self._transact(view[i * FRAME_LEN:(i + 1) * FRAME_LEN])
+        frames = self._frames[:count]
+        valid = ok[:count] & (frames['addr'] == self.address) & (frames['func'] == FUNC_READ)
+        k = int(np.count_nonzero(valid))
+        dist = frames['dist'] if k == count else frames['dist'][valid]
+        out[:k] = dist / scale if scale else dist
+        return k
@@ -0,0 +1,46 @@
+import os
+import numpy as np
+
+SAMPLE_DTYPE = np.dtype('<f4')
+
+class RecordingWriter:
+    '''
+    将距离样本(mm)追加写入原始 float32 记录文件
+    样本先进入预分配缓冲区，满后整块写盘
+    '''
+
+    def __init__(self, path, buffer_size=4096):
+        self.path = path
+        self.count = 0
+        self._f = open(path, 'wb')
+        self._buf = np.empty(buffer_size, dtype=SAMPLE_DTYPE)
+        self._n = 0
+
+    def append(self, value):
+        self._buf[self._n] = value
+        self._n += 1
+        self.count += 1
+        if self._n == len(self._buf):
+            self.flush()
+
+    def extend(self, values):
+        self.flush()
+        values = np.asarray(values, dtype=SAMPLE_DTYPE)
+        self._f.write(values.tobytes())
+        self.count += len(values)
+
+    def flush(self):
+        if self._n:
+            self._f.write(self._buf[:self._n].tobytes())
+            self._n = 0
+        self._f.flush()
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+def open_recording(path):
+    '''以内存映射方式打开记录文件'''
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=SAMPLE_DTYPE)
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode='r')
@@ -0,0 +1,126 @@
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+# 定长样本记录：序号、时间戳(s)、原始距离(0.01mm)
+RECORD_DTYPE = np.dtype([('seq', '<u8'), ('t', '<f8'), ('dist', '<i4'), ('_pad', '<u4')])
+HEADER_SIZE = 64  # 头部：已写入记录总数(u8)、容量(u8)
+INVALID_SEQ = np.iinfo(np.uint64).max  # 写入过程中的记录序号
+
+class SampleRing:
+    '''
+    基于 multiprocessing.shared_memory 的单写多读环形缓冲区
+    写端先作废记录序号、写入数据、再写序号，最后递增头部计数；
+    读端按计数取新记录，复制后用记录内的序号和再次读取的头部计数剔除被覆盖或正在写入的数据
+    '''
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self._header = np.ndarray(2, dtype='<u8', buffer=shm.buf)
+        self.capacity = int(self._header[1])
+        self._records = np.ndarray(self.capacity, dtype=RECORD_DTYPE, buffer=shm.buf, offset=HEADER_SIZE)
+
+    @classmethod
+    def create(cls, capacity=1 << 16, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        header = np.ndarray(2, dtype='<u8', buffer=shm.buf)
+        header[0] = 0
+        header[1] = capacity
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return int(self._header[0])
+
+    def write(self, t, dist):
+        seq = int(self._header[0])
+        rec = self._records[seq % self.capacity]
+        rec['seq'] = INVALID_SEQ
+        rec['t'] = t
+        rec['dist'] = dist
+        rec['seq'] = seq
+        self._header[0] = seq + 1
+
+    def read_since(self, last_seq):
+        '''
+        读取序号 >= last_seq 的新记录，返回 (记录数组, 下一次的 last_seq)
+        读端落后超过容量时只返回仍在缓冲区内的记录
+        '''
+        head = self.head
+        start = max(last_seq, head - self.capacity)
+        if start >= head:
+            return self._records[:0].copy(), head
+        i0, i1 = start % self.capacity, head % self.capacity
+        if i0 < i1:
+            out = self._records[i0:i1].copy()
+        else:
+            out = np.concatenate([self._records[i0:], self._records[:i1]])
+        # 复制期间被写端覆盖的记录序号不连续，丢弃；
+        # 序号可能在覆盖前被读到，因此按复制结束后的头部计数再剔除可能被覆盖的记录
+        expected = np.arange(start, start + len(out), dtype=np.uint64)
+        overwritten = self.head - self.capacity
+        out = out[(out['seq'] == expected) & (expected.astype(np.int64) > overwritten)]
+        return out, head
+
+    def latest(self):
+        head = self.head
+        if head == 0:
+            return None
+        rec = self._records[(head - 1) % self.capacity].copy()
+        if rec['seq'] != head - 1 or self.head - self.capacity >= head - 1:
+            return None  # 复制期间被覆盖
+        return rec
+
+    def close(self):
+        del self._header, self._records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def acquisition_loop(ring_name, port, baudrate, stop_event, address=0x01):
+    '''独立采集进程：打开串口并持续把样本写入共享环形缓冲区'''
+    import serial
+    from .receiver import DistanceReader
+
+    ring = SampleRing.attach(ring_name)
+    ser = serial.Serial(port, baudrate=baudrate, bytesize=8, parity='N', stopbits=1, timeout=0.1)
+    reader = DistanceReader(ser, address)
+    try:
+        while not stop_event.is_set():
+            dist = reader.read_one()
+            if dist is not None:
+                ring.write(time.time(), dist)
+    finally:
+        ser.close()
+        ring.close()
+
+class AcquisitionProcess:
+    '''在单独进程中采集，GUI 进程映射同一块共享内存读取样本'''
+
+    def __init__(self, port, baudrate, capacity=1 << 16, address=0x01):
+        self.ring = SampleRing.create(capacity)
+        self._stop = mp.Event()
+        self._process = mp.Process(target=acquisition_loop, daemon=True,
+                                   args=(self.ring.name, port, baudrate, self._stop, address))
+
+    def start(self):
+        self._process.start()
+
+    def stop(self):
+        self._stop.set()
+        self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._process.terminate()
+        self.ring.close()
@@ -0,0 +1,128 @@
+import struct
+import time
+import numpy as np
+from .modbus import calc_crc16
+from .raster_scan import StageModel
+
+class SimulatedPart:
+    '''
+    模拟工件表面：平整基准面上分布若干圆孔
+    holes 为 (x_mm, y_mm, 直径mm, 深度mm) 列表，noise_mm 为测量噪声标准差
+    '''
+
+    def __init__(self, baseline_mm=20.0, holes=(), noise_mm=0.01, seed=None):
+        self.baseline_mm = baseline_mm
+        self.holes = list(holes)
+        self.noise_mm = noise_mm
+        self.rng = np.random.default_rng(seed)
+
+    def distance_at(self, x, y):
+        '''返回位置 (x, y) 处的距离(mm)，孔内距离增大'''
+        d = self.baseline_mm
+        for hx, hy, diameter, depth in self.holes:
+            if (x - hx) ** 2 + (y - hy) ** 2 <= (diameter / 2) ** 2:
+                d = max(d, self.baseline_mm + depth)
+        if self.noise_mm:
+            d += self.rng.normal(0.0, self.noise_mm)
+        return d
+
+class SimulatedStage(StageModel):
+    '''
+    本地模拟平台：移动时记录当前位置，read_distance 返回模拟工件在该点的读数，
+    可在没有平台和传感器时代替二者进行光栅扫描
+    '''
+
+    def __init__(self, part, n_lines, samples_per_line, step_mm=0.3, line_pitch_mm=0.3, serpentine=False):
+        super().__init__(n_lines, samples_per_line, step_mm, line_pitch_mm, serpentine)
+        self.part = part
+        self.x = 0.0
+        self.y = 0.0
+
+    def move_to(self, line, pos):
+        self.x, self.y = self.position_mm(line, pos)
+
+    def read_distance(self):
+        '''与 laser_detecting.read_distance 相同的返回值（单位0.01mm）'''
+        return int(round(self.part.distance_at(self.x, self.y) * 100))
+
+def simulated_line_scan(part, n_samples, step_mm=0.3, y_mm=0.0):
+    '''沿 x 方向的模拟单线扫描，返回距离数组(mm)'''
+    return np.array([part.distance_at(i * step_mm, y_mm) for i in range(n_samples)])
+
+def hole_grid(rows, cols, pitch_mm, diameter_mm=0.48, depth_mm=2.0, origin=(1.0, 1.0)):
+    '''生成规则排列的孔位列表，供 SimulatedPart 使用'''
+    ox, oy = origin
+    return [(ox + c * pitch_mm, oy + r * pitch_mm, diameter_mm, depth_mm)
+            for r in range(rows) for c in range(cols)]
+
+def synthetic_trace(n_samples, baseline_mm=20.0, hole_pitch=200, hole_width=8, depth_mm=2.0,
+                    noise_mm=0.01, seed=None):
+    '''
+    向量化生成单线扫描距离序列(mm)：每 hole_pitch 个样本出现一个宽 hole_width 的小孔
+    '''
+    rng = np.random.default_rng(seed)
+    trace = baseline_mm + rng.normal(0.0, noise_mm, n_samples)
+    in_hole = (np.arange(n_samples) % hole_pitch) >= hole_pitch - hole_width
+    trace[in_hole] += depth_mm
+    return trace
+
+class SimulatedSensor:
+    '''
+    Modbus 层的模拟传感器，实现 read/readinto/write 等串口接口，
+    可传给 DistanceReader、discovery.probe 等代替真实串口
+    每次读距离依次返回 profile 中的下一个值(mm)；realtime=True 时按波特率模拟传输耗时
+    '''
+
+    def __init__(self, profile=None, address=0x01, baudrate=9600, realtime=False):
+        if profile is None:
+            profile = synthetic_trace(4096, seed=0)
+        self.profile = np.round(np.asarray(profile) * 100).astype(np.int64)
+        self.address = address
+        self.baudrate = baudrate
+        self.realtime = realtime
+        self.timeout = 0.1
+        self.is_open = True
+        self.registers = {0x0001: 0, 0x0002: 500, 0x0003: 0, 0x0004: 0, 0x0005: 1}
+        self.index = 0
+        self._pending = b''
+
+    def byte_time(self, n):
+        return n * 10 / self.baudrate  # 8N1 每字节10位
+
+    def _reply(self, body):
+        return body + struct.pack('<H', calc_crc16(body))
+
+    def write(self, data):
+        if self.realtime:
+            time.sleep(self.byte_time(len(data)))
+        if len(data) != 8 or data[0] != self.address:
+            return len(data)
+        addr, func, reg, value = struct.unpack_from('>BBHH', data)
+        if func == 0x04 and reg == 0x0000:
+            dist = int(self.profile[self.index % len(self.profile)])
+            self.index += 1
+            self._pending = self._reply(struct.pack('>BBBI', addr, func, 4, dist))
+        elif func == 0x04:
+            regs = [self.registers.get(reg + i, 0) for i in range(value)]
+            self._pending = self._reply(struct.pack(f'>BBB{value}H', addr, func, 2 * value, *regs))
+        elif func == 0x06:
+            self.registers[reg] = value
+            self._pending = bytes(data)
+        return len(data)
+
+    def read(self, size=1):
+        data, self._pending = self._pending[:size], self._pending[size:]
+        if self.realtime:
+            time.sleep(self.byte_time(len(data)))
+        return data
+
+    def readinto(self, buf):
+        data = self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._pending = b''
+
+    def close(self):
+        self.is_open = False
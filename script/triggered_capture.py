@@ -0,0 +1,99 @@
+import numpy as np
+from .recording import RecordingWriter, open_recording
+
+# 窗口索引：起始样本序号、触发样本序号、在窗口数据文件中的偏移和长度（样本数）
+WINDOW_INDEX_DTYPE = np.dtype([('start_seq', '<i8'), ('trigger_seq', '<i8'),
+                               ('offset', '<i8'), ('length', '<i4'), ('_pad', '<i4')])
+
+class TriggeredCapture:
+    '''
+    触发式记录：只保存偏差超过阈值（检测到特征）前后的窗口
+    pre_samples 个触发前样本保存在环形缓冲区中，特征结束后再记录 post_samples 个样本；
+    其余平面数据每 context_decimation 个只保留一个作为上下文
+
+    输出文件（prefix 为路径前缀）：
+        <prefix>.windows.f32   各窗口样本依次拼接
+        <prefix>.windows.idx   窗口索引，WINDOW_INDEX_DTYPE
+        <prefix>.context.f32   抽稀的上下文样本
+    '''
+
+    def __init__(self, prefix, baseline, threshold=1.0, pre_samples=50, post_samples=50,
+                 context_decimation=100, max_window=100000):
+        self.prefix = prefix
+        self.baseline = baseline
+        self.threshold = threshold
+        self.post_samples = post_samples
+        self.context_decimation = context_decimation
+        self.max_window = max_window
+        self.seq = 0
+        self.window_count = 0
+        self._ring = np.empty(pre_samples, dtype=np.float32)
+        self._ring_len = 0
+        self._ring_pos = 0
+        self._capturing = False
+        self._quiet = 0
+        self._window_start = 0
+        self._trigger_seq = 0
+        self._window_offset = 0
+        self._windows = RecordingWriter(prefix + ".windows.f32")
+        self._context = RecordingWriter(prefix + ".context.f32")
+        self._index = open(prefix + ".windows.idx", 'wb')
+
+    def _pre_trigger(self):
+        n, pos = self._ring_len, self._ring_pos
+        if n < len(self._ring):
+            return self._ring[:n]
+        return np.concatenate([self._ring[pos:], self._ring[:pos]])
+
+    def append(self, dist):
+        seq = self.seq
+        self.seq += 1
+        if seq % self.context_decimation == 0:
+            self._context.append(dist)
+
+        above = dist - self.baseline > self.threshold
+        if self._capturing:
+            self._windows.append(dist)
+            self._quiet = 0 if above else self._quiet + 1
+            if self._quiet >= self.post_samples or seq - self._window_start + 1 >= self.max_window:
+                self._end_window()
+        elif above:
+            pre = self._pre_trigger()
+            self._capturing = True
+            self._quiet = 0
+            self._window_start = seq - len(pre)
+            self._window_offset = self._windows.count
+            self._trigger_seq = seq
+            self._windows.extend(pre)
+            self._windows.append(dist)
+            self._ring_len = 0
+            self._ring_pos = 0
+        elif len(self._ring):
+            self._ring[self._ring_pos] = dist
+            self._ring_pos = (self._ring_pos + 1) % len(self._ring)
+            self._ring_len = min(self._ring_len + 1, len(self._ring))
+
+    def _end_window(self):
+        rec = np.zeros(1, dtype=WINDOW_INDEX_DTYPE)
+        rec['start_seq'] = self._window_start
+        rec['trigger_seq'] = self._trigger_seq
+        rec['offset'] = self._window_offset
+        rec['length'] = self._windows.count - self._window_offset
+        self._index.write(rec.tobytes())
+        self._capturing = False
+        self.window_count += 1
+
+    def close(self):
+        if self._capturing:
+            self._end_window()
+        self._windows.close()
+        self._context.close()
+        self._index.close()
+
+def read_windows(prefix):
+    '''依次返回已记录窗口的 (起始样本序号, 触发样本序号, 样本数组)'''
+    index = np.fromfile(prefix + ".windows.idx", dtype=WINDOW_INDEX_DTYPE)
+    samples = open_recording(prefix + ".windows.f32")
+    for rec in index:
+        start = int(rec['offset'])
+        yield int(rec['start_seq']), int(rec['trigger_seq']), samples[start:start + int(rec['length'])]
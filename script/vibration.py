@@ -0,0 +1,131 @@
+from collections import namedtuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 振动分析结果：主频(Hz)、对应单峰幅值(mm)、最大峰峰值估计(mm)、是否超出容许值
+VibrationReport = namedtuple('VibrationReport', 'freqs amplitudes peak_to_peak exceeds sample_rate')
+
+class VibrationMonitor:
+    '''
+    距离信号的滚动频谱分析，用于发现平台或夹具振动
+    样本按批送入，凑满的窗口（长度 window，步长 hop）一次性加汉宁窗做 rfft，
+    平均幅值谱给出主要振动频率和幅值
+
+    tolerance_mm 为允许的振动峰峰值，默认取小孔判定阈值的一半，
+    超过时小孔深度判定可能被振动误触发
+    '''
+
+    def __init__(self, sample_rate=None, window=256, hop=128, threshold=1.0, tolerance_mm=None,
+                 n_peaks=3, capacity=1 << 14, jitter=0.2):
+        self.sample_rate = sample_rate  # 为空时由时间戳估计
+        self._fixed_rate = sample_rate is not None
+        self.window = window
+        self.hop = hop
+        self.tolerance_mm = tolerance_mm if tolerance_mm is not None else threshold / 2
+        self.n_peaks = n_peaks
+        self.jitter = jitter  # 相邻样本间隔偏离采样周期超过该比例时视为采样中断
+        self._taper = np.hanning(window)
+        self._scale = 2.0 / self._taper.sum()  # 单边幅值谱归一化
+        self._buf = np.empty(max(capacity, window + hop), dtype=np.float64)
+        self._n = 0
+        self._last_t = None
+        self.last_report = None
+
+    def restart(self):
+        '''
+        采样中断（间隔变化或样本被剔除）：丢弃未凑满窗口的样本，
+        未指定固定采样率时重新估计采样率
+        '''
+        self._n = 0
+        if not self._fixed_rate:
+            self.sample_rate = None
+
+    def _update_rate(self, dt):
+        dt = dt[np.isfinite(dt)]
+        if len(dt) == 0:
+            return
+        period = float(np.median(dt))
+        if period > 0:
+            rate = 1.0 / period
+            self.sample_rate = rate if self.sample_rate is None else 0.9 * self.sample_rate + 0.1 * rate
+
+    def update(self, samples, timestamps=None):
+        '''
+        送入一批样本(mm)，凑满窗口时返回 VibrationReport，否则返回 None
+        给出时间戳时，间隔偏离采样周期（采样率切换、小孔样本被剔除等）处视为中断，
+        中断前未凑满窗口的样本丢弃，保证每个分析窗口内的样本等间隔
+        '''
+        samples = np.asarray(samples, dtype=np.float64)
+        if timestamps is None:
+            return self._append(samples)
+        t = np.asarray(timestamps, dtype=np.float64)
+        if len(t) == 0:
+            return None
+        dt = np.diff(t, prepend=self._last_t if self._last_t is not None else np.nan)
+        self._last_t = float(t[-1])
+        if self.sample_rate:
+            period = 1.0 / self.sample_rate
+        else:
+            finite = dt[np.isfinite(dt)]
+            period = float(np.median(finite)) if len(finite) else np.nan
+        with np.errstate(invalid='ignore'):
+            breaks = np.flatnonzero(np.abs(dt - period) > self.jitter * period)
+        bounds = np.unique(np.concatenate(([0], breaks, [len(t)])))
+        report = None
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if len(breaks) and a in breaks:
+                self.restart()
+                self._update_rate(dt[a + 1:b])
+            else:
+                self._update_rate(dt[a:b])
+            report = self._append(samples[a:b]) or report
+        return report
+
+    def _append(self, samples):
+        report = None
+        while len(samples):
+            take = min(len(samples), len(self._buf) - self._n)
+            self._buf[self._n:self._n + take] = samples[:take]
+            self._n += take
+            samples = samples[take:]
+            if self._n >= self.window:
+                report = self._analyze() or report
+        return report
+
+    def _analyze(self):
+        n_frames = (self._n - self.window) // self.hop + 1
+        report = None
+        if self.sample_rate is not None:
+            frames = sliding_window_view(self._buf[:self._n], self.window)[::self.hop][:n_frames]
+            report = self._spectrum_report(frames)
+        # 保留未被完整窗口消耗的尾部样本
+        keep = self._n - n_frames * self.hop
+        self._buf[:keep] = self._buf[n_frames * self.hop:self._n]
+        self._n = keep
+        return report
+
+    def _spectrum_report(self, frames):
+        centered = frames - frames.mean(axis=1, keepdims=True)
+        spectrum = np.abs(np.fft.rfft(centered * self._taper, axis=1)).mean(axis=0) * self._scale
+        spectrum[0] = 0.0
+        freqs = np.fft.rfftfreq(self.window, 1.0 / self.sample_rate)
+        # 只取局部极大值，避免同一振动峰的相邻频点重复出现
+        is_peak = np.zeros(len(spectrum), dtype=bool)
+        is_peak[1:-1] = (spectrum[1:-1] >= spectrum[:-2]) & (spectrum[1:-1] > spectrum[2:])
+        peaks = np.flatnonzero(is_peak)
+        top = peaks[np.argsort(spectrum[peaks])[::-1][:self.n_peaks]]
+        if len(top) == 0:
+            top = np.array([int(np.argmax(spectrum))])
+        peak_to_peak = float(centered.max() - centered.min())
+        report = VibrationReport(freqs[top], spectrum[top], peak_to_peak,
+                                 2 * float(spectrum[top[0]]) > self.tolerance_mm, self.sample_rate)
+        self.last_report = report
+        return report
+
+    def format(self):
+        r = self.last_report
+        if r is None:
+            return "振动: 数据不足"
+        peaks = "，".join(f"{f:.1f}Hz {a * 1000:.1f}μm" for f, a in zip(r.freqs, r.amplitudes))
+        flag = "  超出容许值!" if r.exceeds else ""
+        return f"振动: {peaks}{flag}"